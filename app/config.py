@@ -8,7 +8,7 @@ import os, json
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
 
-# Load .env early so boto3 can see AWS_* env vars
+# Load .env early so botocore can see AWS_* env vars
 if os.getenv("ENV", "dev") != "prod":
     dotenv_path = REPO_ROOT / ".env"
     if dotenv_path.exists():
@@ -19,17 +19,66 @@ class Settings(BaseSettings):
     GOOGLE_CLIENT_ID: str
     GOOGLE_CLIENT_SECRET: str
     GOOGLE_REDIRECT_URL: str
+    # Google discovery document + signing keys, cached in-process (app/services/google_oidc.py)
+    GOOGLE_OIDC_CACHE_TTL_SECONDS: int = 3600
 
     SESSION_SECRET: str
     SECRET_KEY: str
 
     DATABASE_URL: Optional[str] = None  # if not set, uses IAM auth
     SQLALCHEMY_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0  # wait for a free connection before failing the request
     FRONTEND_ORIGIN: str = "http://localhost:5173"
     ENV: str = "dev"
 
+    # GET /metrics requires `Authorization: Bearer <token>` when set
+    METRICS_TOKEN: Optional[str] = None
+
+    # Per-request timing (app/timing.py). Profiling needs pyinstrument installed:
+    # a PROFILE_SAMPLE_RATE fraction of requests is profiled, and those taking at
+    # least PROFILE_SLOW_MS are saved to PROFILE_DIR as speedscope JSON.
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_SLOW_MS: float = 0.0
+    PROFILE_DIR: str = "/tmp/logima-profiles"
+
+    # Password hashing (app/security.py); calibrate costs with bench/calibrate_argon2.py
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    PASSWORD_HASH_WORKERS: int = 2
+
+    # In-process cache of the authenticated principal (see app/deps.py)
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10_000
+
+    # Encoded project read responses (see app/response_cache.py)
+    PROJECT_CACHE_TTL_SECONDS: int = 10
+    PROJECT_CACHE_MAX_ENTRIES: int = 5_000
+
+    # Background project outcome generation (see app/services/jobs.py)
+    OUTCOME_JOB_CONCURRENCY: int = 4
+    OUTCOME_JOB_TIMEOUT_SECONDS: float = 60.0
+    OUTCOME_JOB_MAX_PENDING: int = 200  # creates get a 503 beyond this backlog
+
     # OpenAI — keep your existing attr name but accept either env var casing
     openai_api_key: str = Field(validation_alias=AliasChoices("OPENAI_API_KEY", "openai_api_key"))
+    # Memoized outcomes (see OutcomeCache in app/services/openai_service.py)
+    OPENAI_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    OPENAI_CACHE_MAX_ENTRIES: int = 2048
+    OPENAI_CACHE_DB: bool = False  # also share results across instances via Postgres
+    OPENAI_CACHE_DB_MAX_ROWS: int = 100_000
+    # Global cap on concurrent model calls and how long a caller may queue for one
+    OPENAI_MAX_CONCURRENCY: int = 8
+    OPENAI_QUEUE_TIMEOUT_SECONDS: float = 10.0
+    # Circuit breaker and hedged requests for the model path
+    OPENAI_BREAKER_FAILURES: int = 5
+    OPENAI_BREAKER_RESET_SECONDS: float = 30.0
+    OPENAI_HEDGE: bool = False
+    # Streaming: longest gap between events, and cap on the whole stream
+    OPENAI_STREAM_IDLE_SECONDS: float = 8.0
+    OPENAI_STREAM_DEADLINE_SECONDS: float = 60.0
 
     # --- AWS/S3 ---
     AWS_REGION: str = "us-east-2"  # your bucket is in Ohio
@@ -43,12 +92,19 @@ class Settings(BaseSettings):
         "text/plain", "application/octet-stream",
     ]
     SQS_UPLOADS_QUEUE_URL: str | None = None
+    # Multipart uploads for large artifacts
+    S3_MULTIPART_PART_SIZE: int = 16 * 1024 * 1024
+    S3_MULTIPART_MAX_URLS: int = 100        # presigned part URLs per request
+    S3_MULTIPART_STALE_HOURS: int = 24      # abort incomplete uploads older than this
+    S3_HEAD_CONCURRENCY: int = 8            # parallel HEADs in /uploads/confirm-batch
 
     # Local dev creds (optional). Leave unset in prod (EC2 role will be used).
     AWS_ACCESS_KEY_ID: Optional[str] = None
     AWS_SECRET_ACCESS_KEY: Optional[str] = None
     AWS_SESSION_TOKEN: Optional[str] = None
     AWS_PROFILE: Optional[str] = None  # if you prefer profiles locally
+    AWS_ENDPOINT_URL: Optional[str] = None  # local S3/SQS stand-in (moto, LocalStack); unset in prod
+    AWS_MAX_POOL_CONNECTIONS: int = 50      # HTTP connections per AWS client
 
     # Accept JSON (preferred) or CSV in .env for content types
     @field_validator("S3_ALLOWED_CONTENT_TYPES", mode="before")
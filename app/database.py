@@ -1,9 +1,11 @@
 # app/database.py
 import asyncio
-from typing import AsyncGenerator, Optional
-from urllib.parse import quote_plus
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Optional
 
-import boto3
+from sqlalchemy import event
+from sqlalchemy.engine import URL
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
@@ -11,32 +13,80 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from app.config import settings
+from app.services.aws import clients as aws_clients
+from app.timing import instrument_engine
 
 # Globals created lazily
 _engine = None
 _SessionLocal: Optional[async_sessionmaker[AsyncSession]] = None
 _engine_lock = asyncio.Lock()
 
-# boto3 client for IAM auth token
-_rds = boto3.client("rds", region_name=settings.AWS_REGION)
+# RDS IAM tokens are valid for 15 minutes; mint a new one well before that.
+IAM_TOKEN_TTL_SECONDS = 600
+# Connections authenticated with an old token keep working, but we retire
+# them over time so the pool turns over gradually instead of all at once.
+POOL_RECYCLE_SECONDS = 1800
 
-def _iam_token() -> str:
-    """Create a short-lived DB auth token for IAM login."""
+async def _iam_token() -> str:
+    """Create a short-lived DB auth token for IAM login (signed locally, no network)."""
     if not (settings.DB_HOST and settings.DB_USER and settings.DB_PORT):
         raise RuntimeError("DB_HOST/DB_USER/DB_PORT must be set for IAM auth")
-    return _rds.generate_db_auth_token(
+    rds = await aws_clients.get("rds")
+    return await rds.generate_db_auth_token(
         DBHostname=settings.DB_HOST,
         Port=int(settings.DB_PORT),
         DBUsername=settings.DB_USER,
     )
 
-def _build_async_url_with_token() -> str:
-    pwd = quote_plus(_iam_token())
-    host = settings.DB_HOST
-    port = int(settings.DB_PORT)
-    db   = settings.DB_NAME or ""
-    user = settings.DB_USER
-    return f"postgresql+asyncpg://{user}:{pwd}@{host}:{port}/{db}"
+class IamTokenProvider:
+    """
+    Mints and caches the IAM auth token. Each new pooled connection asks
+    for a token at connect time, so the engine never has to be rebuilt.
+    `get` is a coroutine function: asyncpg accepts it as the password and
+    awaits it while connecting.
+    """
+
+    def __init__(self, ttl_seconds: float = IAM_TOKEN_TTL_SECONDS, mint=_iam_token):
+        self._ttl = ttl_seconds
+        self._mint = mint
+        self._token: Optional[str] = None
+        self._minted_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._token is not None and (time.monotonic() - self._minted_at) < self._ttl
+
+    async def get(self) -> str:
+        if not self._fresh():
+            async with self._lock:
+                if not self._fresh():
+                    await self.refresh()
+        return self._token
+
+    async def refresh(self) -> str:
+        # Only swap the cached value once the new token exists, so concurrent
+        # connects keep using the previous (still valid) token meanwhile.
+        token = await self._mint()
+        self._token, self._minted_at = token, time.monotonic()
+        return token
+
+_token_provider = IamTokenProvider()
+
+def install_iam_auth(engine, provider: IamTokenProvider) -> None:
+    """Authenticate every new connection of `engine` with `provider`'s current token."""
+    @event.listens_for(engine.sync_engine, "do_connect")
+    def _provide_iam_token(dialect, conn_rec, cargs, cparams):
+        cparams["password"] = provider.get  # awaited by asyncpg per connection
+
+def _build_iam_url() -> URL:
+    # No password in the URL: it's supplied per connection by _token_provider.
+    return URL.create(
+        "postgresql+asyncpg",
+        username=settings.DB_USER,
+        host=settings.DB_HOST,
+        port=int(settings.DB_PORT),
+        database=settings.DB_NAME or "",
+    )
 
 async def _create_engine_and_factory():
     """Create async engine + sessionmaker. Uses DATABASE_URL if provided, else IAM."""
@@ -46,19 +96,27 @@ async def _create_engine_and_factory():
         url = settings.DATABASE_URL
         connect_args = {}
     else:
-        url = _build_async_url_with_token()
+        url = _build_iam_url()
         # RDS Proxy requires TLS; asyncpg accepts ssl=True
         connect_args = {"ssl": True}
+        await _token_provider.refresh()
 
     _engine = create_async_engine(
         url,
         echo=settings.SQLALCHEMY_ECHO,
         pool_pre_ping=True,
-        pool_size=10,
-        max_overflow=20,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=POOL_RECYCLE_SECONDS,
         connect_args=connect_args,
     )
 
+    instrument_engine(_engine)  # per-request DB time for Server-Timing
+
+    if not settings.DATABASE_URL:
+        install_iam_auth(_engine, _token_provider)
+
     _SessionLocal = async_sessionmaker(
         bind=_engine, expire_on_commit=False, class_=AsyncSession
     )
@@ -71,24 +129,51 @@ async def get_engine():
                 await _create_engine_and_factory()
     return _engine
 
-async def rotate_engine_every(interval_seconds: int = 600):
+def pool_stats() -> dict:
+    """Connection pool gauges for /metrics (empty until the engine exists)."""
+    if _engine is None:
+        return {}
+    pool = _engine.pool
+    if not hasattr(pool, "checkedout"):  # e.g. NullPool
+        return {}
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+
+async def refresh_iam_token_every(interval_seconds: int = IAM_TOKEN_TTL_SECONDS // 2):
     """
-    Background task: every N seconds, dispose the engine and recreate it
-    so new connections get a fresh IAM token. If DATABASE_URL is set,
-    rotation is skipped.
+    Background task: re-mint the cached IAM token ahead of expiry so new
+    connections pick it up. The engine and its pooled connections are left
+    alone. If DATABASE_URL is set, there is nothing to refresh.
     """
-    global _engine
     while True:
         await asyncio.sleep(interval_seconds)
         if settings.DATABASE_URL:
             continue
-        async with _engine_lock:
-            if _engine is not None:
-                await _engine.dispose()
-            await _create_engine_and_factory()
+        await _token_provider.refresh()
 
 # FastAPI dependency (unchanged signature)
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     await get_engine()
     async with _SessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[AsyncSession]:
+    """Session for work outside a request (background jobs, relays)."""
+    await get_engine()
+    async with _SessionLocal() as session:
+        yield session
+
+async def release_connection(session: AsyncSession) -> None:
+    """
+    End the session's current transaction so its connection goes back to the
+    pool. Call this before awaiting slow external work; the next statement on
+    the session checks out a connection again. Loaded objects stay usable
+    because the factory uses expire_on_commit=False.
+    """
+    if session.in_transaction():
+        await session.commit()
@@ -1,28 +1,76 @@
-import os, hmac
+import os, hmac, time
 from fastapi import Depends, HTTPException, Request, Header
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import make_transient_to_detached
 from uuid import UUID
+from app.cache import TTLCache
+from app.config import settings
 from app.database import get_session
 from app.security import decode_access_token
+from app.timing import span
 from app import models
 
+# token string -> user id, kept no longer than the JWT's own expiry
+_token_cache: TTLCache[UUID] = TTLCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+# user id -> column snapshot of the users row
+_user_cache: TTLCache[dict] = TTLCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+
+_USER_COLUMNS = ("id", "email", "created")
+
+def _user_from_snapshot(snapshot: dict) -> models.User:
+    # Fresh detached instance per request so cached state is never shared
+    # between sessions; it behaves like a loaded row for reads and FKs.
+    user = models.User(**snapshot)
+    make_transient_to_detached(user)
+    return user
+
+def _uid_for_token(token: str) -> UUID:
+    uid = _token_cache.get(token)
+    if uid is not None:
+        return uid
+    payload = decode_access_token(token)
+    uid = UUID(payload["sub"])
+    exp = payload.get("exp")
+    ttl = None if exp is None else float(exp) - time.time()
+    _token_cache.set(token, uid, ttl_seconds=ttl)
+    return uid
+
+def invalidate_user(uid: UUID) -> None:
+    """
+    Drop the cached principal for `uid`. Writes are plain Core statements,
+    which no ORM event sees, so any code that updates or deletes a users
+    row must call this after committing; nothing does today (signups only
+    insert). Otherwise a stale snapshot lives for AUTH_CACHE_TTL_SECONDS.
+    """
+    _user_cache.pop(uid)
+
+def principal_cache_stats() -> dict:
+    return {"tokens": _token_cache.stats(), "users": _user_cache.stats()}
+
 async def get_current_user(request: Request, db: AsyncSession = Depends(get_session)) -> models.User:
+    with span("auth"):
+        return await _current_user(request, db)
+
+async def _current_user(request: Request, db: AsyncSession) -> models.User:
     token = request.cookies.get("access_token")
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
     try:
-        payload = decode_access_token(token)
-        uid = UUID(payload["sub"])
+        uid = _uid_for_token(token)
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
+    snapshot = _user_cache.get(uid)
+    if snapshot is not None:
+        return _user_from_snapshot(snapshot)
     q = await db.execute(select(models.User).where(models.User.id == uid))
     user = q.scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
+    _user_cache.set(uid, {c: getattr(user, c) for c in _USER_COLUMNS})
     return user
 
 def require_csrf(request: Request, x_csrf_token: str = Header(None)):
     cookie = request.cookies.get("csrf_token")
     if not cookie or not x_csrf_token or not hmac.compare_digest(cookie, x_csrf_token):
-        raise HTTPException(status_code=403, detail="CSRF validation failed")
\ No newline at end of file
+        raise HTTPException(status_code=403, detail="CSRF validation failed")
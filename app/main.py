@@ -1,20 +1,34 @@
 import asyncio
-from fastapi import FastAPI
+import hmac
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from contextlib import asynccontextmanager, suppress
-from app.database import get_engine, rotate_engine_every
+from app import metrics
+from app.database import get_engine, pool_stats, refresh_iam_token_every
+from app.deps import principal_cache_stats
 from app.routers import auth, projects, uploads
-from app.config import Settings
+from app.services import outbox
+from app.services.multipart_cleanup import run_multipart_cleanup
+from app.services.aws import clients as aws_clients
+from app.services.google_oidc import google_oidc
+from app.config import settings
+from app.responses import FastJSONResponse
+from app.security import hasher_pool
+from app.timing import TimingMiddleware
 
 
-settings = Settings()
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # --- startup ---
     await get_engine()  # warm the pool once so first request is fast
-    rotator = asyncio.create_task(rotate_engine_every(600))  # refresh IAM token/engine every 10m
+    rotator = asyncio.create_task(refresh_iam_token_every())  # keep the IAM token fresh for new connections
+    # publish ArtifactUploaded events from the outbox (safe to run on every instance)
+    relay = asyncio.create_task(outbox.run_relay()) if settings.SQS_UPLOADS_QUEUE_URL else None
+    multipart_janitor = asyncio.create_task(run_multipart_cleanup())  # abort orphaned multipart uploads
+    oidc_refresher = asyncio.create_task(google_oidc.run_refresher())  # prefetch Google metadata + keys
+    outcome_sweep = asyncio.create_task(projects.sweep_stale_outcomes())  # outcomes left pending by a crash
     try:
         yield
     finally:
@@ -22,13 +36,26 @@ async def lifespan(app: FastAPI):
         rotator.cancel()
         with suppress(asyncio.CancelledError):
             await rotator
+        for task in (relay, multipart_janitor, oidc_refresher, outcome_sweep):
+            if task is None:
+                continue
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        await projects.outcome_jobs.shutdown()
+        if relay is not None:
+            await outbox.drain()  # publish events committed since the relay's last pass
         eng = await get_engine()
         await eng.dispose()
+        await aws_clients.close()
+        await projects.oai_service.aclose()
+        hasher_pool.close()
 
 app = FastAPI(
     title="logima-backed API",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,  # orjson for every JSON response
 )
 
 # --- CORS so React can talk to it locally ---
@@ -39,7 +66,8 @@ app.add_middleware(
     allow_origins=[settings.FRONTEND_ORIGIN],
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["Content-Type", "Authorization", "X-CSRF-Token"],
+    allow_headers=["Content-Type", "Authorization", "X-CSRF-Token", "If-None-Match"],
+    expose_headers=["X-Next-Cursor", "ETag", "Server-Timing"],
 )
 
 # Session middleware for Authlib (stores OAuth state/nonce)
@@ -48,6 +76,24 @@ app.add_middleware(
     secret_key=settings.SESSION_SECRET,
 )
 
+# Server-Timing header + per-request log line (app/timing.py)
+app.add_middleware(TimingMiddleware)
+
+# Outermost, so latency includes the other middleware
+app.add_middleware(metrics.MetricsMiddleware)
+
+# --- Metrics sampled on each /metrics scrape ---
+metrics.register("logima_db_pool", pool_stats)
+metrics.register("logima_threadpool", metrics.threadpool_stats)
+metrics.register("logima_openai", projects.oai_service.gauges)
+metrics.register("logima_outcome_jobs", lambda: {
+    "pending": projects.outcome_jobs.pending, "rejected_total": projects.outcome_jobs.rejected,
+})
+metrics.register("logima_project_read_cache", projects.read_cache.stats)
+metrics.register("logima_principal_cache", principal_cache_stats)
+metrics.register("logima_password_hash", hasher_pool.stats)
+metrics.register("logima_google_oidc", google_oidc.stats)
+
 # --- Register routers ---
 app.include_router(projects.router)  # this makes /projects/... routes active
 app.include_router(auth.router) # this makes /auth/ routes active
@@ -59,4 +105,12 @@ def read_root():
     return {"status": "ok"}
 
 @app.get("/healthz")
-def healthz(): return {"ok": True}
\ No newline at end of file
+def healthz(): return {"ok": True}
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    if settings.METRICS_TOKEN:
+        supplied = request.headers.get("authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(supplied, settings.METRICS_TOKEN):
+            raise HTTPException(status_code=401, detail="Not authenticated")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,161 @@
+# app/metrics.py
+"""
+In-process metrics, rendered in the Prometheus text format at GET /metrics.
+
+The hot path only touches plain numbers: Histogram.observe is a bisect and
+a few additions on the event-loop thread, no locks. Gauges are never kept
+up to date; registered collectors are sampled when /metrics is scraped.
+"""
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import anyio.to_thread
+
+from app import timing
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)) + "}"
+
+class Histogram:
+    """Fixed-bucket histogram keyed by label values (positional, in `labelnames` order)."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        s = self._series.get(labels)
+        if s is None:
+            s = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        s[bisect_left(self.buckets, value)] += 1
+        s[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        for labels, s in self._series.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), s):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {s[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+REQUEST_SECONDS = Histogram(
+    "logima_http_request_duration_seconds",
+    "Request latency by route template, from first byte in to last byte out.",
+    ("method", "route", "status"),
+)
+EXTERNAL_CALL_SECONDS = Histogram(
+    "logima_external_call_duration_seconds",
+    "Latency of calls to S3, SQS and OpenAI.",
+    ("service", "operation", "outcome"),
+)
+
+class timed_call:
+    """
+    Time one external call into EXTERNAL_CALL_SECONDS and the request's
+    Server-Timing breakdown:
+
+        with timed_call("s3", "head_object"):
+            r = await s3.head_object(...)
+    """
+
+    __slots__ = ("service", "operation", "_started")
+
+    def __init__(self, service: str, operation: str):
+        self.service = service
+        self.operation = operation
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._started
+        EXTERNAL_CALL_SECONDS.observe(elapsed, self.service, self.operation, "error" if exc_type else "ok")
+        timing.record(self.service, elapsed)  # Server-Timing span for the current request
+        return False
+
+class MetricsMiddleware:
+    """Pure ASGI middleware feeding REQUEST_SECONDS; labels use the route template, not the raw path."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        status = 500
+
+        async def _send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            route = scope.get("route")  # set by the router on a match
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started, scope["method"],
+                getattr(route, "path", "unmatched"), str(status),
+            )
+
+# --- Gauges sampled at scrape time --------------------------------------
+
+_collectors: List[Tuple[str, Callable[[], dict]]] = []
+
+def register(prefix: str, collect: Callable[[], dict]) -> None:
+    """
+    Sample `collect()` on every scrape. Nested dicts are flattened with "_";
+    keys ending in "_total" are typed as counters, string values become a
+    `state` label.
+    """
+    _collectors.append((prefix, collect))
+
+def _flatten(prefix: str, values: dict):
+    for key, value in values.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            yield from _flatten(name, value)
+        elif value is not None:
+            yield name, value
+
+def threadpool_stats() -> dict:
+    """anyio's default limiter, which Starlette uses for sync endpoints and dependencies."""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    stats = limiter.statistics()
+    return {"tokens": limiter.total_tokens, "borrowed": stats.borrowed_tokens, "waiting": stats.tasks_waiting}
+
+def render() -> str:
+    lines: List[str] = []
+    for prefix, collect in _collectors:
+        for name, value in _flatten(prefix, collect()):
+            kind = "counter" if name.endswith("_total") else "gauge"
+            lines.append(f"# TYPE {name} {kind}")
+            if isinstance(value, str):
+                lines.append(f'{name}{{state="{value}"}} 1')
+            else:
+                lines.append(f"{name} {float(value)}")
+    lines += REQUEST_SECONDS.render()
+    lines += EXTERNAL_CALL_SECONDS.render()
+    return "\n".join(lines) + "\n"
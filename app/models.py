@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, BigInteger, CheckConstraint,Index
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, BigInteger, Integer, CheckConstraint,Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -32,6 +32,18 @@ class Project(Base):
     artifacts = relationship("DiscoveryArtifact", back_populates="project", passive_deletes=True)
 
     project_outcome = Column(String, nullable=True)
+    outcome_status = Column(String, nullable=False, server_default="pending")  # pending|ready|failed
+    # Bumped by every write to the row; drives the ETags in app/response_cache.py
+    revision = Column(Integer, nullable=False, server_default="1", default=1)
+
+    __table_args__ = (
+        CheckConstraint("outcome_status IN ('pending','ready','failed')", name="chk_projects_outcome_status"),
+        # keyset pagination of a user's active projects, newest first
+        Index("ix_projects_owner_active_created", owner_id, created.desc(), id.desc(),
+              postgresql_where=(status == "active")),
+        # startup sweep of outcomes abandoned by a crash or shutdown
+        Index("ix_projects_outcome_pending", created, postgresql_where=(outcome_status == "pending")),
+    )
 
 class User(Base):
     __tablename__='users'
@@ -64,6 +76,10 @@ class DiscoveryArtifact(Base):
     size_bytes = Column(BigInteger, nullable=True)
     etag = Column(Text, nullable=True)
 
+    # Set while a multipart upload is in progress; cleared on complete/abort
+    multipart_upload_id = Column(Text, nullable=True)
+    multipart_part_size = Column(BigInteger, nullable=True)
+
     # Match your naming (you used `created` on Project/User)
     created_at  = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     uploaded_at = Column(DateTime(timezone=True), nullable=True)
@@ -74,7 +90,41 @@ class DiscoveryArtifact(Base):
         Index("ix_da_project_created", "project_id", "created_at"),
         Index("ix_da_user_created",    "user_id",    "created_at"),
         Index("ix_da_status",          "status"),
+        Index("ix_da_multipart_open",  "created_at", postgresql_where=multipart_upload_id.isnot(None)),
     )
 
     project = relationship("Project", back_populates="artifacts")
-    user    = relationship("User",    back_populates="artifacts")
\ No newline at end of file
+    user    = relationship("User",    back_populates="artifacts")
+
+class AiOutcomeCache(Base):
+    """Shared tier of OpenAIService's outcome cache, keyed by a content hash."""
+    __tablename__ = "ai_outcome_cache"
+
+    key = Column(Text, primary_key=True)  # sha256 of model + system prompt + normalized description
+    outcome = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_aoc_expires_at", "expires_at"),
+        Index("ix_aoc_created_at", "created_at"),
+    )
+
+
+class EventOutbox(Base):
+    """Transactional outbox: events committed with their data, published by app/services/outbox.py."""
+    __tablename__ = "event_outbox"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    event_type = Column(String, nullable=False)
+    payload = Column(JSONB, nullable=False)  # the exact SQS message body
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, server_default="0", default=0)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # the relay only ever scans unsent rows in id order
+        Index("ix_outbox_unsent", "id", postgresql_where=sent_at.is_(None)),
+    )
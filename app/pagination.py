@@ -0,0 +1,20 @@
+# app/pagination.py
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+from uuid import UUID
+
+def encode_cursor(created: datetime, id: UUID) -> str:
+    """Opaque keyset cursor for the position just after (created, id)."""
+    raw = json.dumps([created.isoformat(), str(id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Inverse of encode_cursor. Raises ValueError on anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created, id = json.loads(raw)
+        return datetime.fromisoformat(created), UUID(id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
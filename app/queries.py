@@ -0,0 +1,37 @@
+# app/queries.py
+"""
+Read-side queries that select only the columns a response needs, as Core
+rows, so no ORM objects (or relationship loads) are built for reads.
+"""
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import Select, select, tuple_
+
+from app import models, schemas
+
+# Exactly the columns of schemas.ProjectOut, in schema order.
+PROJECT_OUT_COLUMNS = tuple(getattr(models.Project, name) for name in schemas.ProjectOut.model_fields)
+
+# Read queries return PROJECT_OUT_COLUMNS followed by these (for ETags).
+PROJECT_VERSION_COLUMNS = (models.Project.revision,)
+
+def active_projects_page(
+    owner_id: UUID, limit: Optional[int], after: Optional[Tuple[datetime, UUID]] = None,
+) -> Select:
+    """A user's active projects, newest first, keyset-paginated on (created, id); limit=None for all."""
+    query = (
+        select(*PROJECT_OUT_COLUMNS, *PROJECT_VERSION_COLUMNS)
+        .where(
+            models.Project.status == "active",
+            models.Project.owner_id == owner_id)
+        .order_by(models.Project.created.desc(), models.Project.id.desc())
+        .limit(limit)
+    )
+    if after is not None:
+        query = query.where(tuple_(models.Project.created, models.Project.id) < after)
+    return query
+
+def project_by_id(project_id: UUID) -> Select:
+    return select(*PROJECT_OUT_COLUMNS, *PROJECT_VERSION_COLUMNS).where(models.Project.id == project_id)
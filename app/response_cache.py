@@ -0,0 +1,96 @@
+# app/response_cache.py
+"""
+Conditional GET support and a small in-process cache of encoded project
+responses.
+
+Every project row carries a `revision` that each write bumps. A single
+project's ETag comes straight from (id, revision). A list page's ETag is
+a hash of the (id, revision) pairs on the page plus its next cursor.
+Cached bodies are keyed by project id or owner, plus a generation that
+every local write replaces with a never-used number. A reader takes its
+key before querying, so a body read before a concurrent write is stored
+under the old generation and never served; stale bodies are never
+served from this instance. Other instances may serve a stale page for at
+most PROJECT_CACHE_TTL_SECONDS.
+"""
+import hashlib
+import itertools
+from typing import Dict, Hashable, Iterable, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from fastapi import Request
+from starlette.responses import Response
+
+from app.cache import TTLCache
+
+class CachedBody(NamedTuple):
+    etag: str
+    body: bytes
+    headers: Dict[str, str]
+
+def project_etag(project_id: UUID, revision: int) -> str:
+    return f'"{project_id.hex}-{revision}"'
+
+def page_etag(versions: Iterable[Tuple[UUID, int]], next_cursor: Optional[str]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for project_id, revision in versions:
+        h.update(project_id.bytes)
+        h.update(revision.to_bytes(8, "big"))
+    h.update((next_cursor or "").encode())
+    return f'"{h.hexdigest()}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [c.strip() for c in header.split(",")]
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
+
+# Always revalidate: clients keep the body but must check the ETag before reuse.
+_CACHE_HEADERS = {"Cache-Control": "private, no-cache"}
+
+def conditional_response(request: Request, entry: CachedBody) -> Response:
+    headers = {**entry.headers, **_CACHE_HEADERS, "ETag": entry.etag}
+    if etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, headers=headers, media_type="application/json")
+
+class ProjectReadCache:
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self._entries: TTLCache[CachedBody] = TTLCache(maxsize, ttl_seconds)
+        self._gens: TTLCache[int] = TTLCache(maxsize, ttl_seconds)
+        # Process-wide, so a generation that expired or was evicted is never reissued.
+        self._next_gen = itertools.count(1)
+
+    def _generation(self, scope: Hashable) -> int:
+        gen = self._gens.get(scope)
+        if gen is None:
+            # Unknown (or forgotten) scope: a fresh number orphans whatever
+            # bodies an older generation of it may still have cached.
+            gen = next(self._next_gen)
+            self._gens.set(scope, gen)
+        return gen
+
+    def list_key(self, owner_id: UUID, cursor: Optional[str], limit: Optional[int]) -> Hashable:
+        return ("list", owner_id, self._generation(("owner", owner_id)), cursor, limit)
+
+    def project_key(self, project_id: UUID) -> Hashable:
+        return ("project", project_id, self._generation(("project", project_id)))
+
+    def get(self, key: Hashable) -> Optional[CachedBody]:
+        return self._entries.get(key)
+
+    def put(self, key: Hashable, entry: CachedBody) -> None:
+        self._entries.set(key, entry)
+
+    def invalidate(self, *, project_id: Optional[UUID] = None, owner_id: Optional[UUID] = None) -> None:
+        """Call after a project write; orphans its entry and every list page of its owner."""
+        # New generations orphan the old bodies; LRU evicts them.
+        if project_id is not None:
+            self._gens.set(("project", project_id), next(self._next_gen))
+        if owner_id is not None:
+            self._gens.set(("owner", owner_id), next(self._next_gen))
+
+    def stats(self) -> dict:
+        return self._entries.stats()
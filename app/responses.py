@@ -0,0 +1,45 @@
+# app/responses.py
+"""
+JSON responses encoded with orjson.
+
+FastJSONResponse is the app-wide default response class. For trusted
+database output, dumps() and object_response() encode straight to bytes
+and hand FastAPI a ready Response, so response_model validation is
+skipped entirely. Field lists come from the Pydantic schemas, and
+orjson's UUID/datetime output matches Pydantic's (UTC as "Z").
+"""
+import uuid
+from typing import Any, Mapping, Optional, Sequence
+
+import orjson
+from fastapi.responses import JSONResponse
+from starlette.responses import Response
+
+from app import schemas
+from app.timing import span
+
+_OPTS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+def _default(obj: Any) -> Any:
+    # asyncpg returns its own UUID subclass, which orjson doesn't encode natively
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+PROJECT_OUT_FIELDS = tuple(schemas.ProjectOut.model_fields)
+USER_OUT_FIELDS = tuple(schemas.UserOut.model_fields)
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        with span("render"):
+            return orjson.dumps(content, default=_default, option=_OPTS)
+
+def dumps(content: Any) -> bytes:
+    with span("render"):
+        return orjson.dumps(content, default=_default, option=_OPTS)
+
+def object_response(obj: Any, fields: Sequence[str], *,
+                    status_code: int = 200, headers: Optional[Mapping[str, str]] = None) -> Response:
+    """JSON object of `fields` read as attributes (e.g. a loaded ORM object)."""
+    return Response(content=dumps({f: getattr(obj, f) for f in fields}), status_code=status_code,
+                    headers=headers, media_type="application/json")
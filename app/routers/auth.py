@@ -2,16 +2,15 @@ import os
 from fastapi import APIRouter, Depends, HTTPException, Response, status,Request
 from fastapi.responses import RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.database import get_session
 from app import models, schemas
-from app.security import hash_password, verify_password, make_access_token, make_csrf
+from app.security import hash_password_async, verify_password_async, make_access_token, make_csrf
 from app.deps import get_current_user, require_csrf
-from authlib.integrations.starlette_client import OAuth
-
-
-from app.config import Settings
-settings = Settings()
+from app.responses import USER_OUT_FIELDS, object_response
+from app.config import settings
+from app.services.google_oidc import google_oidc
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -22,38 +21,57 @@ SAMESITE = "Lax"          # Lax is fine for typical web app flows
 
 
 # --- Google OAuth (OIDC) ---
-oauth = OAuth()
-oauth.register(
-    name="google",
-    client_id=settings.GOOGLE_CLIENT_ID,
-    client_secret=settings.GOOGLE_CLIENT_SECRET,
-    server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
-    api_base_url="https://openidconnect.googleapis.com/v1/",
-    client_kwargs={"scope": "openid email profile"},
-)
+_oauth = None
+
+def google():
+    """
+    The Authlib Google client, registered on first use so Authlib stays off
+    the import path. Discovery metadata and signing keys come from the
+    shared google_oidc cache instead of being fetched by Authlib per worker,
+    so a sign-in only costs the token-exchange round trip.
+    """
+    global _oauth
+    if _oauth is None:
+        from authlib.integrations.starlette_client import OAuth, StarletteOAuth2App
+
+        class CachedOidcApp(StarletteOAuth2App):
+            async def load_server_metadata(self):
+                self.server_metadata.update(await google_oidc.metadata())
+                return self.server_metadata
+
+            async def fetch_jwk_set(self, force=False):
+                # force=True is Authlib's retry after an unknown kid (key rotation)
+                return await google_oidc.jwks(force=force)
+
+        class CachedOidcOAuth(OAuth):
+            oauth2_client_cls = CachedOidcApp
+
+        _oauth = CachedOidcOAuth()
+        _oauth.register(
+            name="google",
+            client_id=settings.GOOGLE_CLIENT_ID,
+            client_secret=settings.GOOGLE_CLIENT_SECRET,
+            api_base_url="https://openidconnect.googleapis.com/v1/",
+            client_kwargs={"scope": "openid email profile"},
+        )
+    return _oauth.google
 
 @router.get("/google/start")
 async def google_start(request: Request):
     # Authlib manages state/nonce via SessionMiddleware
-    return await oauth.google.authorize_redirect(request, settings.GOOGLE_REDIRECT_URL)
+    return await google().authorize_redirect(request, settings.GOOGLE_REDIRECT_URL)
 
 
 @router.get("/google/callback", response_model=schemas.TokenOK)
 async def google_callback(request: Request, response: Response, db: AsyncSession = Depends(get_session)):
-    # Exchange code -> tokens
-    token = await oauth.google.authorize_access_token(request)
-
-    # Prefer verified ID token claims (email, sub, etc.)
-    # Authlib parses and verifies via Google’s JWKs
-    idinfo = None
-    try:
-        idinfo = await oauth.google.parse_id_token(request, token)
-    except KeyError:
-        idinfo = None
-    
-
+    # Exchange code -> tokens. Authlib verifies the ID token (signature via the
+    # cached JWKS, issuer, audience, nonce) and puts its claims in token["userinfo"],
+    # so usually no userinfo round trip is needed.
+    token = await google().authorize_access_token(request)
+    idinfo = token.get("userinfo")
     if not idinfo:
-        resp = await oauth.google.get("userinfo", token=token)
+        # no id_token in the response: ask the userinfo endpoint instead
+        resp = await google().get("userinfo", token=token)
         if resp.status_code != 200:
             raise HTTPException(status_code=400, detail="Failed to fetch Google userinfo")
         idinfo = resp.json()
@@ -63,12 +81,12 @@ async def google_callback(request: Request, response: Response, db: AsyncSession
     if not email or not email_verified:
         raise HTTPException(status_code=400, detail="Google account email not verified")
 
-    # Upsert user by email
-    q = await db.execute(select(models.User).where(models.User.email == email))
-    user = q.scalar_one_or_none()
-    if not user:
-        # Create a local user record. If your model requires password_hash, set None or a random string.
-        user = models.User(
+    # Get-or-create by email in one statement. ON CONFLICT DO NOTHING leaves a
+    # returning user's row untouched (no rewrite, no WAL); the UNION ALL
+    # branch supplies their id, the CTE a new user's.
+    created = (
+        pg_insert(models.User)
+        .values(
             email=email,
             password_hash=None,  # oauth user
             # You can add optional fields if your model supports them:
@@ -77,12 +95,22 @@ async def google_callback(request: Request, response: Response, db: AsyncSession
             # name=idinfo.get("name"),
             # avatar_url=idinfo.get("picture"),
         )
-        db.add(user)
-        await db.commit()
-        await db.refresh(user)
+        .on_conflict_do_nothing(index_elements=[models.User.email])
+        .returning(models.User.id)
+        .cte("created")
+    )
+    user_id = (await db.execute(union_all(
+        select(created.c.id),
+        select(models.User.id).where(models.User.email == email),
+    ))).scalars().first()
+    if user_id is None:
+        # A concurrent sign-in inserted the row after this statement's snapshot
+        # was taken; it is committed by now, so a fresh read sees it.
+        user_id = (await db.execute(select(models.User.id).where(models.User.email == email))).scalar_one()
+    await db.commit()
 
     # Issue your app token + csrf
-    token_jwt = make_access_token(sub=str(user.id))
+    token_jwt = make_access_token(sub=str(user_id))
     csrf = make_csrf()
 
     redirect = RedirectResponse(url=f"{settings.FRONTEND_ORIGIN.rstrip('/')}/auth/callback", status_code=302)
@@ -96,19 +124,31 @@ async def google_callback(request: Request, response: Response, db: AsyncSession
 @router.post("/register", response_model=schemas.UserOut, status_code=201)
 async def register(payload: schemas.UserCreate, db: AsyncSession = Depends(get_session)):
     email = payload.email.lower()
-    q = await db.execute(select(models.User).where(models.User.email == email))
-    if q.scalar_one_or_none():
+    # A cheap existence check first, so a duplicate signup never pays for a
+    # password hash; ON CONFLICT DO NOTHING still settles two concurrent
+    # signups for the same email.
+    taken = await db.execute(select(1).where(models.User.email == email))
+    if taken.first() is not None:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    result = await db.execute(
+        pg_insert(models.User)
+        .values(email=email, password_hash=await hash_password_async(payload.password))
+        .on_conflict_do_nothing(index_elements=[models.User.email])
+        .returning(models.User.id, models.User.email, models.User.created)
+    )
+    user = result.one_or_none()
+    if user is None:
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Email already registered")
-    user = models.User(email=email, password_hash=hash_password(payload.password))
-    db.add(user); await db.commit(); await db.refresh(user)
-    return user
+    await db.commit()
+    return object_response(user, USER_OUT_FIELDS, status_code=201)
 
 @router.post("/login", response_model=schemas.TokenOK)
 async def login(payload: schemas.LoginIn, response: Response, db: AsyncSession = Depends(get_session)):
     email = payload.email.lower()
     q = await db.execute(select(models.User).where(models.User.email == email))
     user = q.scalar_one_or_none()
-    if not user or not verify_password(payload.password, user.password_hash):
+    if not user or not await verify_password_async(payload.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     token = make_access_token(sub=str(user.id))
@@ -127,5 +167,5 @@ async def logout(response: Response):
 
 @router.get("/me", response_model=schemas.UserOut)
 async def me(user=Depends(get_current_user)):
-    return user
+    return object_response(user, USER_OUT_FIELDS)
 
@@ -1,56 +1,111 @@
-from fastapi import APIRouter, Depends, HTTPException
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import insert, select, update
 from uuid import uuid4, UUID
-from datetime import  datetime, timezone
+from datetime import  datetime, timedelta, timezone
 from typing import List,Optional
 from app.deps import get_current_user, require_csrf
-from app.services.openai_service import OpenAIService
+from app.services.openai_service import OpenAIService, OUTCOME_FALLBACK
+from app.services.jobs import JobQueueFull, JobRunner
 
-from app import schemas, models
-from app.database import get_session
+from app import queries, schemas, models
+from app.responses import PROJECT_OUT_FIELDS, dumps, object_response
+from app.response_cache import (
+    CachedBody, ProjectReadCache, conditional_response, page_etag, project_etag,
+)
+from app.config import settings
+from app.database import get_session, release_connection, session_scope
+from app.pagination import decode_cursor, encode_cursor
+
+log = logging.getLogger(__name__)
 
 oai_service = OpenAIService()
+outcome_jobs = JobRunner(
+    concurrency=settings.OUTCOME_JOB_CONCURRENCY,
+    timeout_s=settings.OUTCOME_JOB_TIMEOUT_SECONDS,
+    max_pending=settings.OUTCOME_JOB_MAX_PENDING,
+)
+
+read_cache = ProjectReadCache(
+    maxsize=settings.PROJECT_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PROJECT_CACHE_TTL_SECONDS,
+)
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
+def _project_dict(row) -> dict:
+    # zip stops at the ProjectOut fields, dropping the trailing version columns
+    return dict(zip(PROJECT_OUT_FIELDS, row))
+
+
+PAGE_SIZE_DEFAULT = 50
+PAGE_SIZE_MAX = 200
 
 @router.get("/api/list", response_model=List[schemas.ProjectOut])
 async def get_projects(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=PAGE_SIZE_MAX, description="Page size; omit for the full list"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     db: AsyncSession = Depends(get_session),
     user=Depends(get_current_user),
 ):
-    # Query all projects, newest first
-    result = await db.execute(
-        select(models.Project)
-        .where(
-            models.Project.status == "active",
-            models.Project.owner_id == user.id)
-        .order_by(models.Project.created.desc())  # sort by created timestamp descending
-        .options(selectinload("*"))  # optional: eager load relationships if needed
+    # Without limit or cursor the whole list comes back, as before pagination existed.
+    if limit is None and cursor:
+        limit = PAGE_SIZE_DEFAULT
+    # Polls usually hit the cache and, with If-None-Match, end in a 304.
+    cache_key = read_cache.list_key(user.id, cursor, limit)
+    cached = read_cache.get(cache_key)
+    if cached is not None:
+        return conditional_response(request, cached)
+
+    # Newest first, keyset-paginated on (created, id); served by ix_projects_owner_active_created.
+    # When more rows exist, the cursor for the next page is returned in X-Next-Cursor.
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # Only the ProjectOut columns, as plain rows: no ORM objects or relationship loads.
+    result = await db.execute(queries.active_projects_page(user.id, None if limit is None else limit + 1, after))
+    rows = result.all()
+    headers = {}
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        headers["X-Next-Cursor"] = encode_cursor(last.created, last.id)
+    # Trusted DB output: encode the rows directly, no per-row ProjectOut validation.
+    entry = CachedBody(
+        etag=page_etag(((r.id, r.revision) for r in rows), headers.get("X-Next-Cursor")),
+        body=dumps([_project_dict(r) for r in rows]),
+        headers=headers,
     )
-    projects = result.scalars().all()
-    return projects
+    read_cache.put(cache_key, entry)
+    return conditional_response(request, entry)
 
 @router.get("/api/{project_id}", response_model=schemas.ProjectOut)
 async def get_project_by_id(
     project_id: UUID,
+    request: Request,
     db: AsyncSession = Depends(get_session)
 ):
-    result = await db.execute(
-        select(models.Project)
-        .where(
-            models.Project.id == project_id,
-        )
-        .options(selectinload("*"))
-    )
-    project = result.scalar_one_or_none()
+    cache_key = read_cache.project_key(project_id)
+    cached = read_cache.get(cache_key)
+    if cached is not None:
+        return conditional_response(request, cached)
+
+    result = await db.execute(queries.project_by_id(project_id))
+    project = result.one_or_none()
     if project is None:
         # Returning 404 avoids leaking existence of other users' IDs.
         raise HTTPException(status_code=404, detail="Project not found")
-    return project
+    entry = CachedBody(etag=project_etag(project.id, project.revision), body=dumps(_project_dict(project)), headers={})
+    read_cache.put(cache_key, entry)
+    return conditional_response(request, entry)
 
 
 
@@ -61,25 +116,109 @@ async def create_project(
     db: AsyncSession = Depends(get_session),
     user = Depends(get_current_user),
 ):
-    
-    ai_project_outcome = await oai_service.generate_outcome(payload.description or "")
-
-    obj = models.Project(
-        id=uuid4(),
-        name=payload.name,
-        owner_id=user.id,
-        status=payload.status,
-        description=payload.description,
-        project_outcome=ai_project_outcome
-    )
-    db.add(obj)
+    # Insert right away; the outcome is generated in the background and
+    # clients poll /api/{project_id}/outcome until it's ready.
+    # INSERT ... RETURNING: one statement, no refresh round trip.
+    if outcome_jobs.full:
+        raise HTTPException(status_code=503, detail="Too many projects being set up; try again shortly.",
+                            headers={"Retry-After": "5"})
     try:
+        result = await db.execute(
+            insert(models.Project)
+            .values(
+                id=uuid4(),
+                name=payload.name,
+                owner_id=user.id,
+                status=payload.status,
+                description=payload.description,
+                outcome_status="pending",
+            )
+            .returning(*queries.PROJECT_OUT_COLUMNS)
+        )
+        obj = result.one()
         await db.commit()
     except IntegrityError:
         await db.rollback()
         raise HTTPException(status_code=400, detail="Project could not be created (constraint failed).")
-    await db.refresh(obj)
-    return obj
+    read_cache.invalidate(owner_id=obj.owner_id)
+
+    project_id, description = obj.id, payload.description or ""
+    try:
+        outcome_jobs.submit(
+            lambda: _fill_project_outcome(project_id, description),
+            name=f"project-outcome:{project_id}",
+            # timed out, failed or cancelled at shutdown: don't leave the row pending
+            on_failure=lambda: _store_outcome(project_id, OUTCOME_FALLBACK, "failed"),
+        )
+    except JobQueueFull:
+        # filled up since the check above; the row exists, so fail its outcome
+        await _store_outcome(project_id, OUTCOME_FALLBACK, "failed")
+        obj = (await db.execute(queries.project_by_id(project_id))).one()
+    return object_response(obj, PROJECT_OUT_FIELDS, status_code=201)
+
+async def _store_outcome(project_id: UUID, outcome: Optional[str], outcome_status: str) -> None:
+    async with session_scope() as db:
+        result = await db.execute(
+            update(models.Project)
+            .where(models.Project.id == project_id)
+            .values(project_outcome=outcome, outcome_status=outcome_status,
+                    revision=models.Project.revision + 1)
+            .returning(models.Project.owner_id)
+        )
+        owner_id = result.scalar_one_or_none()
+        await db.commit()
+    read_cache.invalidate(project_id=project_id, owner_id=owner_id)
+
+async def fail_stale_outcomes() -> int:
+    """
+    Mark outcomes still 'pending' after the job timeout as failed. Jobs never
+    outlive OUTCOME_JOB_TIMEOUT_SECONDS, so such rows were abandoned by a
+    crashed or killed instance. Run at startup; returns the number of rows.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.OUTCOME_JOB_TIMEOUT_SECONDS)
+    async with session_scope() as db:
+        result = await db.execute(
+            update(models.Project)
+            .where(models.Project.outcome_status == "pending", models.Project.created < cutoff)
+            .values(project_outcome=OUTCOME_FALLBACK, outcome_status="failed",
+                    revision=models.Project.revision + 1)
+            .returning(models.Project.id, models.Project.owner_id)
+            .execution_options(synchronize_session=False)
+        )
+        rows = result.all()
+        await db.commit()
+    for row in rows:
+        read_cache.invalidate(project_id=row.id, owner_id=row.owner_id)
+    return len(rows)
+
+async def sweep_stale_outcomes() -> None:
+    """Startup task wrapper around fail_stale_outcomes (never raises)."""
+    try:
+        n = await fail_stale_outcomes()
+    except Exception:
+        log.exception("stale outcome sweep failed")
+        return
+    if n:
+        log.warning("marked %d abandoned project outcomes as failed", n)
+
+async def _fill_project_outcome(project_id: UUID, description: str) -> None:
+    outcome = await oai_service.generate_outcome(description)
+    await _store_outcome(project_id, outcome, "failed" if outcome == OUTCOME_FALLBACK else "ready")
+
+@router.get("/api/{project_id}/outcome", response_model=schemas.ProjectOutcomeStatus,
+            dependencies=[Depends(get_current_user)])
+async def get_project_outcome(
+    project_id: UUID,
+    db: AsyncSession = Depends(get_session),
+):
+    result = await db.execute(
+        select(models.Project.id, models.Project.outcome_status, models.Project.project_outcome)
+        .where(models.Project.id == project_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return dict(row._mapping)
 
 @router.patch("/api/{project_id}", response_model=schemas.ProjectOut,
               dependencies=[Depends(get_current_user),Depends(require_csrf)])
@@ -88,10 +227,6 @@ async def update_project(
     payload: schemas.ProjectUpdate,
     db: AsyncSession = Depends(get_session),
 ):
-    obj = await db.get(models.Project, project_id)
-    if not obj:
-        raise HTTPException(status_code=404, detail="Project not found")
-
     # Only apply fields that were provided
     ALLOWED_FIELDS = {"name", "status", "project_outcome"}
 
@@ -101,18 +236,31 @@ async def update_project(
 
     if not data:
         raise HTTPException(status_code=400, detail="No fields to update.")
-    
-    for k, v in data.items():
-        setattr(obj, k, v)
 
+    # UPDATE ... RETURNING: one statement instead of get + commit + refresh.
     try:
-        await db.commit()
+        obj = await _update_returning(db, project_id, **data)
     except IntegrityError:
         await db.rollback()
         raise HTTPException(status_code=400, detail="Project could not be updated (constraint failed).")
+    if obj is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return object_response(obj, PROJECT_OUT_FIELDS)
 
-    await db.refresh(obj)
-    return obj
+async def _update_returning(db: AsyncSession, project_id: UUID, **values):
+    """Apply `values` and bump the revision in one statement; returns the ProjectOut row or None."""
+    result = await db.execute(
+        update(models.Project)
+        .where(models.Project.id == project_id)
+        .values(**values, revision=models.Project.revision + 1)
+        .returning(*queries.PROJECT_OUT_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    row = result.one_or_none()
+    await db.commit()
+    if row is not None:
+        read_cache.invalidate(project_id=row.id, owner_id=row.owner_id)
+    return row
 
 # AI focused APIs for high level project
 @router.post(
@@ -125,13 +273,18 @@ async def regenerate_project_outcome(
     payload: Optional[schemas.OutcomeRegenerate] = None,  # optional override
     db: AsyncSession = Depends(get_session),
 ):
-    obj = await db.get(models.Project, project_id)
-    if not obj:
+    result = await db.execute(
+        select(models.Project.description).where(models.Project.id == project_id)
+    )
+    row = result.one_or_none()
+    if row is None:
         raise HTTPException(status_code=404, detail="Project not found")
 
     # Choose description: override if provided, else use current project.description
-    source_description = (obj.description)
-    
+    source_description = row.description or ""
+
+    # Hand the connection back while the model runs; the commit below checks one out again.
+    await release_connection(db)
 
     try:
         new_outcome = await oai_service.generate_outcome(source_description)
@@ -139,18 +292,70 @@ async def regenerate_project_outcome(
         # Surface a clean error; you can map specific exceptions as needed
         raise HTTPException(status_code=502, detail=f"AI generation failed: {e}")
 
-    obj.project_outcome = new_outcome
     # Optional: track when/why this changed
-    # obj.outcome_updated_at = datetime.utcnow()
-    # obj.outcome_update_reason = "ai_refresh"
-
+    # outcome_updated_at=..., outcome_update_reason="ai_refresh"
     try:
-        await db.commit()
+        obj = await _update_returning(
+            db, project_id,
+            project_outcome=new_outcome,
+            outcome_status="failed" if new_outcome == OUTCOME_FALLBACK else "ready",
+        )
     except IntegrityError:
         await db.rollback()
         raise HTTPException(status_code=400, detail="Project could not be updated (constraint failed).")
+    if obj is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return object_response(obj, PROJECT_OUT_FIELDS)
 
-    await db.refresh(obj)
-    return obj
+def _sse(event: str, data: dict) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
 
+@router.post(
+    "/api/{project_id}/ai-refresh/stream",
+    dependencies=[Depends(get_current_user), Depends(require_csrf)],
+)
+async def stream_project_outcome(
+    project_id: UUID,
+    db: AsyncSession = Depends(get_session),
+):
+    """
+    Streaming ai-refresh: relays the model's text as Server-Sent Events
+    (`delta` events, then a final `done` or `error`) and stores the
+    finished outcome. If the client disconnects, Starlette cancels the
+    body iterator and the upstream stream is closed with it.
+    """
+    result = await db.execute(
+        select(models.Project.description).where(models.Project.id == project_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    description = row.description or ""
+
+    # Nothing else to read; don't hold a connection for the length of the stream.
+    await release_connection(db)
 
+    async def events():
+        parts = []
+        stream = oai_service.stream_outcome(description)
+        try:
+            async for delta in stream:
+                parts.append(delta)
+                yield _sse("delta", {"text": delta})
+        except Exception:
+            yield _sse("error", {"detail": "AI generation failed"})
+            return
+        finally:
+            await stream.aclose()
+
+        # an empty answer is no outcome: store the fallback, as the job path does
+        outcome = "".join(parts).strip() or OUTCOME_FALLBACK
+        outcome_status = "failed" if outcome == OUTCOME_FALLBACK else "ready"
+        await _store_outcome(project_id, outcome, outcome_status)
+        yield _sse("done", {"outcome_status": outcome_status, "project_outcome": outcome})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
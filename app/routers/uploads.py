@@ -2,16 +2,26 @@
 from dataclasses import asdict
 from fastapi import APIRouter, HTTPException, Query, Depends
 from app.services.s3_service import build_object_key, create_presigned_post
-from app.schemas import PresignedPostOut, PresignedPostResponse
+from app.schemas import (
+    PresignedPostOut, PresignedPostResponse,
+    PresignBatchIn, PresignBatchItemOut, PresignBatchResponse,
+    MultipartInitiateIn, MultipartInitiateOut, MultipartPartsIn, MultipartPartsOut,
+    MultipartStatusOut, MultipartCompleteIn,
+    ConfirmBatchIn, ConfirmBatchItemOut, ConfirmBatchResponse,
+)
 from app.config import settings
-from app.database import get_session
+from app.database import get_session, release_connection
 from sqlalchemy.orm import Session
-from app.models import DiscoveryArtifact
+from app.models import DiscoveryArtifact, EventOutbox
 from datetime import datetime, timezone
-from app.services.s3_service import head_object
-from starlette.concurrency import run_in_threadpool
+from app.services.s3_service import (
+    S3_MAX_PARTS, head_object, multipart_layout, create_multipart_upload, presign_upload_part,
+    list_uploaded_parts, complete_multipart_upload, abort_multipart_upload,
+)
+import asyncio
+from sqlalchemy import BigInteger, Text, column, func, insert, select, update, values
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.services.event_bus import publish_artifact_uploaded
+from app.services.outbox import artifact_uploaded_row, enqueue_artifact_uploaded, notify_relay, outbox_enabled
 
 router = APIRouter(prefix="/uploads", tags=["uploads"])
 
@@ -26,7 +36,7 @@ async def presign_post(
 ):
     try:
         key = build_object_key(filename=filename, project_id=project_id, user_id=user_id)
-        token = create_presigned_post(
+        token = await create_presigned_post(
             key=key,
             content_type=content_type,
             max_bytes=max_bytes,
@@ -52,6 +62,61 @@ async def presign_post(
         # log `e` if you have a logger
         raise HTTPException(status_code=500, detail="Failed to presign upload")
     
+@router.post("/presign-batch", response_model=PresignBatchResponse)
+async def presign_batch(
+    payload: PresignBatchIn,
+    db: AsyncSession = Depends(get_session),
+):
+    """
+    Presign many uploads at once. Each file is validated on its own and a
+    rejected file gets an `error` in its result instead of failing the
+    batch; all accepted files are recorded with a single INSERT.
+    """
+    async def _sign(i, f):
+        try:
+            if f.max_bytes is not None and not 1 <= f.max_bytes <= settings.S3_MAX_BYTES:
+                raise ValueError(f"max_bytes must be between 1 and {settings.S3_MAX_BYTES}")
+            key = build_object_key(filename=f.filename, project_id=payload.project_id, user_id=payload.user_id)
+            token = await create_presigned_post(key=key, content_type=f.content_type, max_bytes=f.max_bytes)
+            return i, f, token, None
+        except ValueError as ve:
+            return i, f, None, str(ve)
+        except Exception:
+            return i, f, None, "Failed to presign upload"
+
+    signed = await asyncio.gather(*(_sign(i, f) for i, f in enumerate(payload.files)))
+
+    rows = [
+        dict(
+            s3_key=token.key,
+            project_id=payload.project_id,
+            user_id=payload.user_id,
+            original_filename=f.filename,
+            content_type=f.content_type,
+            s3_bucket=settings.S3_BUCKET,
+            public_url=token.public_url,
+            status="pending",
+        )
+        for _, f, token, _ in signed if token is not None
+    ]
+    if rows:
+        try:
+            await db.execute(insert(DiscoveryArtifact).values(rows))
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise HTTPException(status_code=500, detail="Failed to record uploads")
+
+    return {"results": [
+        PresignBatchItemOut(
+            index=i,
+            filename=f.filename,
+            upload=PresignedPostOut(**asdict(token)) if token is not None else None,
+            error=err,
+        )
+        for i, f, token, err in signed
+    ]}
+
 @router.post("/confirm")
 async def confirm_upload(
     key: str = Query(..., min_length=3),
@@ -63,10 +128,7 @@ async def confirm_upload(
         raise HTTPException(status_code=404, detail="Artifact not found")
 
     try:
-        # head_object uses boto3 (blocking). Run in a thread to avoid blocking the event loop:
-        meta = await run_in_threadpool(head_object, key=key)
-        # If you prefer to call directly, it's usually fine too for small loads:
-        # meta = head_object(key=key)
+        meta = await head_object(key=key)
     except Exception:
         # client can retry confirm shortly after if S3 is not yet consistent
         raise HTTPException(status_code=409, detail=f"Object not visible yet for {key}")
@@ -78,17 +140,213 @@ async def confirm_upload(
         from datetime import datetime, timezone
         artifact.uploaded_at = datetime.now(timezone.utc)
 
+    # The event commits atomically with the status change; the outbox relay publishes it.
+    enqueue_artifact_uploaded(db, artifact)
     await db.commit()
+    notify_relay()
+
+    return {"ok": True, "key": key, "size_bytes": artifact.size_bytes, "etag": artifact.etag, "status": artifact.status}
+
+# S3 usually shows a fresh object within a second or two; a failed HEAD is worth retrying.
+CONFIRM_RETRY_AFTER_S = 2
+
+@router.post("/confirm-batch", response_model=ConfirmBatchResponse)
+async def confirm_batch(
+    payload: ConfirmBatchIn,
+    db: AsyncSession = Depends(get_session),
+):
+    """
+    Confirm many uploads at once: HEAD every object (at most
+    S3_HEAD_CONCURRENCY in flight), then record all visible ones with one
+    UPDATE ... FROM (VALUES ...) and one outbox INSERT. Keys S3 can't see
+    yet come back with a retry_after hint instead of failing the batch.
+    """
+    keys = list(dict.fromkeys(payload.keys))
+    found = {
+        a.s3_key: a
+        for a in (await db.execute(
+            select(DiscoveryArtifact).where(DiscoveryArtifact.s3_key.in_(keys))
+        )).scalars()
+    }
+    await release_connection(db)  # no connection held during the HEADs
+
+    sem = asyncio.Semaphore(settings.S3_HEAD_CONCURRENCY)
+
+    async def _head(key: str):
+        async with sem:
+            try:
+                return key, await head_object(key=key), None
+            except FileNotFoundError:
+                return key, None, "not_visible"
+            except Exception:
+                return key, None, "error"
 
-    await run_in_threadpool(
-        publish_artifact_uploaded,
-        s3_key=artifact.s3_key,
-        bucket=artifact.s3_bucket,
-        project_id=str(artifact.project_id) if artifact.project_id else None,
-        user_id=str(artifact.user_id) if artifact.user_id else None,
-        original_filename=artifact.original_filename,
-        content_type=artifact.content_type,
-        public_url=artifact.public_url or "",
+    heads = await asyncio.gather(*(_head(k) for k in keys if k in found))
+    results = {k: ConfirmBatchItemOut(key=k, status="not_found") for k in keys if k not in found}
+    confirmed = []
+    for key, meta, problem in heads:
+        if problem:
+            results[key] = ConfirmBatchItemOut(key=key, status=problem, retry_after=CONFIRM_RETRY_AFTER_S)
+            continue
+        artifact = found[key]
+        size = meta.get("content_length") or artifact.size_bytes
+        etag = meta.get("etag") or artifact.etag
+        confirmed.append((key, size, etag))
+        results[key] = ConfirmBatchItemOut(key=key, status="uploaded", size_bytes=size, etag=etag)
+
+    if confirmed:
+        v = values(
+            column("s3_key", Text), column("size_bytes", BigInteger), column("etag", Text), name="v",
+        ).data(confirmed)
+        await db.execute(
+            update(DiscoveryArtifact)
+            .where(DiscoveryArtifact.s3_key == v.c.s3_key)
+            .values(
+                size_bytes=v.c.size_bytes,
+                etag=v.c.etag,
+                status="uploaded",
+                uploaded_at=func.coalesce(DiscoveryArtifact.uploaded_at, func.now()),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if outbox_enabled():
+            await db.execute(insert(EventOutbox).values([artifact_uploaded_row(found[k]) for k, _, _ in confirmed]))
+        await db.commit()
+        notify_relay()
+
+    return {"results": [results[k] for k in keys]}
+
+# --- Multipart uploads (large artifacts) --------------------------------
+# initiate -> request part URLs in batches -> PUT parts in parallel -> complete.
+# GET /multipart/parts lists what S3 already has, so a client can resume.
+
+async def _open_multipart_artifact(db: AsyncSession, key: str) -> DiscoveryArtifact:
+    artifact = await db.get(DiscoveryArtifact, key)
+    if not artifact:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    if not artifact.multipart_upload_id:
+        raise HTTPException(status_code=409, detail=f"No multipart upload in progress for {key}")
+    return artifact
+
+@router.post("/multipart/initiate", response_model=MultipartInitiateOut)
+async def multipart_initiate(
+    payload: MultipartInitiateIn,
+    db: AsyncSession = Depends(get_session),
+):
+    if payload.size_bytes > settings.S3_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"File exceeds {settings.S3_MAX_BYTES} bytes")
+    key = build_object_key(filename=payload.filename, project_id=payload.project_id, user_id=payload.user_id)
+    try:
+        upload = await create_multipart_upload(key=key, content_type=payload.content_type)
+    except ValueError as ve:
+        raise HTTPException(status_code=415, detail=str(ve))
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to start multipart upload")
+
+    part_size, part_count = multipart_layout(payload.size_bytes)
+    artifact = DiscoveryArtifact(
+        s3_key=key,
+        project_id=payload.project_id,
+        user_id=payload.user_id,
+        original_filename=payload.filename,
+        content_type=payload.content_type,
+        s3_bucket=settings.S3_BUCKET,
+        public_url=upload.public_url,
+        status="pending",
+        multipart_upload_id=upload.upload_id,
+        multipart_part_size=part_size,
+        size_bytes=payload.size_bytes,  # declared size; replaced by S3's on complete
+    )
+    db.add(artifact)
+    try:
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        await abort_multipart_upload(key=key, upload_id=upload.upload_id)
+        raise HTTPException(status_code=500, detail="Failed to record upload")
+    return MultipartInitiateOut(
+        key=key, upload_id=upload.upload_id, part_size=part_size, part_count=part_count, public_url=artifact.public_url,
     )
 
-    return {"ok": True, "key": key, "size_bytes": artifact.size_bytes, "etag": artifact.etag, "status": artifact.status}
\ No newline at end of file
+@router.post("/multipart/parts", response_model=MultipartPartsOut)
+async def multipart_part_urls(
+    payload: MultipartPartsIn,
+    db: AsyncSession = Depends(get_session),
+):
+    if len(payload.part_numbers) > settings.S3_MULTIPART_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.S3_MULTIPART_MAX_URLS} parts per request")
+    artifact = await _open_multipart_artifact(db, payload.key)
+    upload_id = artifact.multipart_upload_id
+    part_count = S3_MAX_PARTS
+    if artifact.size_bytes is not None:
+        _, part_count = multipart_layout(artifact.size_bytes, artifact.multipart_part_size)
+    if not all(1 <= n <= part_count for n in payload.part_numbers):
+        raise HTTPException(status_code=400, detail=f"part_number must be between 1 and {part_count}")
+
+    try:
+        parts = [
+            {"part_number": n, "url": await presign_upload_part(key=payload.key, upload_id=upload_id, part_number=n)}
+            for n in sorted(set(payload.part_numbers))
+        ]
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    return {"key": payload.key, "parts": parts}
+
+@router.get("/multipart/parts", response_model=MultipartStatusOut)
+async def multipart_uploaded_parts(
+    key: str = Query(..., min_length=3),
+    db: AsyncSession = Depends(get_session),
+):
+    artifact = await _open_multipart_artifact(db, key)
+    try:
+        parts = await list_uploaded_parts(key=key, upload_id=artifact.multipart_upload_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=410, detail=f"Multipart upload expired for {key}")
+    return {"key": key, "part_size": artifact.multipart_part_size, "parts": parts}
+
+@router.post("/multipart/complete")
+async def multipart_complete(
+    payload: MultipartCompleteIn,
+    db: AsyncSession = Depends(get_session),
+):
+    artifact = await _open_multipart_artifact(db, payload.key)
+    upload_id = artifact.multipart_upload_id
+    await release_connection(db)  # don't pin a connection while S3 assembles the object
+
+    try:
+        done = await complete_multipart_upload(
+            key=payload.key, upload_id=upload_id, parts=[p.model_dump() for p in payload.parts],
+        )
+        meta = await head_object(key=payload.key)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception:
+        raise HTTPException(status_code=502, detail=f"Failed to complete upload for {payload.key}")
+
+    artifact.size_bytes = meta.get("content_length") or artifact.size_bytes
+    artifact.etag = done.get("etag") or meta.get("etag")
+    artifact.status = "uploaded"
+    artifact.multipart_upload_id = None
+    if artifact.uploaded_at is None:
+        artifact.uploaded_at = datetime.now(timezone.utc)
+
+    enqueue_artifact_uploaded(db, artifact)
+    await db.commit()
+    notify_relay()
+
+    return {"ok": True, "key": payload.key, "size_bytes": artifact.size_bytes, "etag": artifact.etag, "status": artifact.status}
+
+@router.post("/multipart/abort")
+async def multipart_abort(
+    key: str = Query(..., min_length=3),
+    db: AsyncSession = Depends(get_session),
+):
+    artifact = await _open_multipart_artifact(db, key)
+    try:
+        await abort_multipart_upload(key=key, upload_id=artifact.multipart_upload_id)
+    except Exception:
+        raise HTTPException(status_code=502, detail=f"Failed to abort upload for {key}")
+    artifact.multipart_upload_id = None
+    artifact.status = "failed"
+    await db.commit()
+    return {"ok": True, "key": key, "status": artifact.status}
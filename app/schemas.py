@@ -1,7 +1,7 @@
-from pydantic import BaseModel, EmailStr, constr
+from pydantic import BaseModel, EmailStr, Field, constr
 from uuid import UUID
 from datetime import datetime
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 
 class ProjectCreate(BaseModel):
@@ -17,7 +17,8 @@ class ProjectOut(BaseModel):
     owner_id: UUID
     status: str
     description: Optional[str] = None
-    project_outcome: str
+    project_outcome: Optional[str] = None
+    outcome_status: str
 
 class ProjectUpdate(BaseModel):
     name: Optional[str] = None
@@ -45,6 +46,11 @@ class TokenOK(BaseModel):
 class ProjectList(BaseModel):
     created_by: str
 
+class ProjectOutcomeStatus(BaseModel):
+    id: UUID
+    outcome_status: str  # pending|ready|failed
+    project_outcome: Optional[str] = None
+
 class OutcomeRegenerate(BaseModel):
     description: Optional[str] = None  # if provided, will be used as the AI input
 
@@ -55,4 +61,76 @@ class PresignedPostOut(BaseModel):
     public_url: str
 
 class PresignedPostResponse(BaseModel):
-    upload: PresignedPostOut
\ No newline at end of file
+    upload: PresignedPostOut
+
+class PresignBatchFile(BaseModel):
+    filename: constr(min_length=1)
+    content_type: constr(min_length=3)
+    max_bytes: Optional[int] = None  # optional override <= bucket limit
+
+class PresignBatchIn(BaseModel):
+    project_id: Optional[str] = None
+    user_id: Optional[str] = None
+    files: List[PresignBatchFile] = Field(..., min_length=1, max_length=100)
+
+class PresignBatchItemOut(BaseModel):
+    index: int                                # position in the request's `files`
+    filename: str
+    upload: Optional[PresignedPostOut] = None
+    error: Optional[str] = None               # set instead of `upload` when this file was rejected
+
+class PresignBatchResponse(BaseModel):
+    results: List[PresignBatchItemOut]
+
+class MultipartInitiateIn(BaseModel):
+    filename: constr(min_length=1)
+    content_type: constr(min_length=3)
+    size_bytes: int = Field(..., ge=1)
+    project_id: Optional[str] = None
+    user_id: Optional[str] = None
+
+class MultipartInitiateOut(BaseModel):
+    key: str
+    upload_id: str
+    part_size: int
+    part_count: int
+    public_url: str
+
+class MultipartPartsIn(BaseModel):
+    key: str
+    part_numbers: List[int] = Field(..., min_length=1)
+
+class MultipartPartUrl(BaseModel):
+    part_number: int
+    url: str
+
+class MultipartPartsOut(BaseModel):
+    key: str
+    parts: List[MultipartPartUrl]
+
+class MultipartUploadedPart(BaseModel):
+    part_number: int
+    etag: str
+    size: Optional[int] = None
+
+class MultipartStatusOut(BaseModel):
+    key: str
+    part_size: Optional[int] = None
+    parts: List[MultipartUploadedPart]  # already stored; skip these when resuming
+
+class MultipartCompleteIn(BaseModel):
+    key: str
+    parts: List[MultipartUploadedPart] = Field(..., min_length=1)
+
+class ConfirmBatchIn(BaseModel):
+    keys: List[str] = Field(..., min_length=1, max_length=100)
+
+class ConfirmBatchItemOut(BaseModel):
+    key: str
+    status: str                          # uploaded | not_visible | not_found | error
+    size_bytes: Optional[int] = None
+    etag: Optional[str] = None
+    retry_after: Optional[int] = None    # seconds; set when confirming again later may succeed
+
+class ConfirmBatchResponse(BaseModel):
+    results: List[ConfirmBatchItemOut]
@@ -1,19 +1,96 @@
-import os, secrets, jwt, hmac
+import os, secrets, jwt, hmac, asyncio, multiprocessing, time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from passlib.context import CryptContext
 
-from app.config import Settings
-settings = Settings()
+from app.config import settings
 
 SECRET_KEY = settings.SECRET_KEY
 ALGO = "HS256"
 ACCESS_MIN = 60
-pwd_ctx = CryptContext(schemes=["argon2"], deprecated="auto")
+# Cost parameters: pick them with bench/calibrate_argon2.py. Existing hashes
+# keep verifying after a change since the parameters are stored in each hash.
+pwd_ctx = CryptContext(
+    schemes=["argon2"], deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
 
 def hash_password(p: str) -> str: return pwd_ctx.hash(p)
 def verify_password(p: str, h: str) -> bool: return pwd_ctx.verify(p, h)
 
+class PasswordHasherPool:
+    """
+    Runs argon2 hashing in worker processes so it never blocks the event loop.
+
+    At most `workers` hashes run at once; further callers wait on the loop
+    (not in the executor), so queued/in-flight counts and wait times are
+    measurable. The pool is started on first use and shut down via close().
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = asyncio.Semaphore(workers)
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process with a running loop and client threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def run(self, fn, *args):
+        started = time.perf_counter()
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        waited = time.perf_counter() - started
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool(), fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "completed_total": self.completed,
+            "queue_wait_seconds_total": self.wait_seconds_total,
+            "queue_wait_seconds_max": self.wait_seconds_max,
+        }
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+hasher_pool = PasswordHasherPool(workers=settings.PASSWORD_HASH_WORKERS)
+
+async def hash_password_async(p: str) -> str:
+    return await hasher_pool.run(hash_password, p)
+
+async def verify_password_async(p: str, h: Optional[str]) -> bool:
+    if not h:  # OAuth-only users have no password
+        return False
+    return await hasher_pool.run(verify_password, p, h)
+
 def make_access_token(sub: str, minutes: int = ACCESS_MIN) -> str:
     exp = datetime.now(timezone.utc) + timedelta(minutes=minutes)
     return jwt.encode({"sub": sub, "exp": exp}, SECRET_KEY, algorithm=ALGO)
@@ -0,0 +1,64 @@
+# app/services/aws.py
+from __future__ import annotations
+
+import asyncio
+from contextlib import AsyncExitStack
+from typing import Any, Dict
+
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
+
+from app.config import settings
+
+def _config(service: str) -> AioConfig:
+    kwargs: Dict[str, Any] = {
+        "retries": {"max_attempts": 3, "mode": "standard"},
+        "max_pool_connections": settings.AWS_MAX_POOL_CONNECTIONS,
+    }
+    if service == "s3":
+        kwargs.update(signature_version="s3v4", connect_timeout=5, read_timeout=60)
+    return AioConfig(**kwargs)
+
+class AwsClients:
+    """
+    Shared asyncio-native (aiobotocore) clients, one per service.
+
+    Clients are created on first use and keep their own HTTP connection
+    pool (AWS_MAX_POOL_CONNECTIONS), so S3/SQS/RDS calls never take a
+    threadpool slot. Set AWS_ENDPOINT_URL to point every service at a
+    local stand-in (moto server, LocalStack). close() runs on shutdown.
+    """
+
+    def __init__(self):
+        self._session = get_session()
+        self._stack = AsyncExitStack()
+        self._clients: Dict[str, Any] = {}
+        self._lock = asyncio.Lock()
+
+    async def get(self, service: str):
+        client = self._clients.get(service)
+        if client is not None:
+            return client
+        async with self._lock:
+            if service not in self._clients:
+                self._clients[service] = await self._stack.enter_async_context(
+                    self._session.create_client(
+                        service,
+                        region_name=settings.AWS_REGION,
+                        endpoint_url=settings.AWS_ENDPOINT_URL,
+                        config=_config(service),
+                    )
+                )
+        return self._clients[service]
+
+    def override(self, service: str, client: Any) -> None:
+        """Use `client` for `service` instead of a real one (local fakes in bench/)."""
+        self._clients[service] = client
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._stack.aclose()
+            self._stack = AsyncExitStack()
+            self._clients.clear()
+
+clients = AwsClients()
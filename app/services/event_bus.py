@@ -1,22 +1,23 @@
 from __future__ import annotations
-import json, time
-import boto3
-from botocore.config import Config as BotoConfig
+import asyncio, json, logging, time
+from typing import List
 from app.config import settings
+from app.services.aws import clients
+from app.metrics import timed_call
 
-_sqs = boto3.client(
-    "sqs",
-    region_name=settings.AWS_REGION,
-    config=BotoConfig(retries={"max_attempts": 3, "mode": "standard"}),
-)
+log = logging.getLogger(__name__)
 
-def publish_artifact_uploaded(*, s3_key: str, bucket: str, project_id: str | None,
-                              user_id: str | None, original_filename: str,
-                              content_type: str, public_url: str):
-    if not settings.SQS_UPLOADS_QUEUE_URL:
-       
-        return  # silently skip in local if not configured
-    body = {
+SQS_MAX_BATCH = 10  # hard limit of SendMessageBatch
+
+_EVENT_ATTRIBUTES = {
+    "event": {"StringValue": "ArtifactUploaded", "DataType": "String"},
+}
+
+def artifact_uploaded_event(*, s3_key: str, bucket: str, project_id: str | None,
+                            user_id: str | None, original_filename: str,
+                            content_type: str, public_url: str) -> dict:
+    """ArtifactUploaded message body (schema version 1)."""
+    return {
         "type": "ArtifactUploaded",
         "version": "1",
         "occurred_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
@@ -31,10 +32,38 @@ def publish_artifact_uploaded(*, s3_key: str, bucket: str, project_id: str | Non
             "public_url": public_url,
         },
     }
-    _sqs.send_message(
-        QueueUrl=settings.SQS_UPLOADS_QUEUE_URL,
-        MessageBody=json.dumps(body),
-        MessageAttributes={
-            "event": {"StringValue": "ArtifactUploaded", "DataType": "String"},
-        },
-    )
\ No newline at end of file
+
+async def _send_batch_once(bodies: List[dict]) -> List[int]:
+    """One SendMessageBatch call; returns the indexes of entries SQS rejected."""
+    sqs = await clients.get("sqs")
+    with timed_call("sqs", "send_message_batch"):
+        resp = await sqs.send_message_batch(
+            QueueUrl=settings.SQS_UPLOADS_QUEUE_URL,
+            Entries=[
+                {"Id": str(i), "MessageBody": json.dumps(body), "MessageAttributes": _EVENT_ATTRIBUTES}
+                for i, body in enumerate(bodies)
+            ],
+        )
+    failed = resp.get("Failed") or []
+    for f in failed:
+        log.warning("SQS rejected entry %s: %s %s", f.get("Id"), f.get("Code"), f.get("Message"))
+    return [int(f["Id"]) for f in failed]
+
+async def send_batch(bodies: List[dict], *, attempts: int = 3, backoff_s: float = 0.2) -> List[int]:
+    """
+    Send up to SQS_MAX_BATCH bodies, retrying only the entries that failed.
+    Returns the indexes (into `bodies`) of those still failed after `attempts` tries.
+    """
+    pending = list(range(len(bodies)))
+    for attempt in range(attempts):
+        if not pending:
+            break
+        try:
+            failed_idx = await _send_batch_once([bodies[i] for i in pending])
+        except Exception:
+            log.warning("SQS batch send failed (attempt %d)", attempt + 1, exc_info=True)
+            failed_idx = list(range(len(pending)))
+        pending = [pending[i] for i in failed_idx]
+        if pending and attempt + 1 < attempts:
+            await asyncio.sleep(backoff_s * (2 ** attempt))
+    return pending
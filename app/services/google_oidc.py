@@ -0,0 +1,117 @@
+# app/services/google_oidc.py
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+import httpx
+
+from app.config import settings
+from app.metrics import timed_call
+from app.timing import background_task, span
+
+log = logging.getLogger(__name__)
+
+GOOGLE_DISCOVERY_URL = "https://accounts.google.com/.well-known/openid-configuration"
+
+class OidcProviderCache:
+    """
+    Caches an OpenID provider's discovery document and JWKS.
+
+    run_refresher() fetches both at startup and again every ttl_s / 2, so
+    requests read them from memory. Concurrent refreshes share one fetch
+    (singleflight). A token signed with an unknown `kid` (key rotation)
+    calls jwks(force=True): that refetches once, joined by every request
+    that misses at the same time, and at most once per
+    `min_refetch_interval_s` so bogus kids can't hammer the provider. If a
+    refresh fails, the last good copy keeps being served.
+    """
+
+    def __init__(self, discovery_url: str, ttl_s: float, min_refetch_interval_s: float = 30.0,
+                 timeout_s: float = 5.0):
+        self.discovery_url = discovery_url
+        self.ttl_s = ttl_s
+        self.min_refetch_interval_s = min_refetch_interval_s
+        self.timeout_s = timeout_s
+        self._metadata: Optional[dict] = None
+        self._jwks: Optional[dict] = None
+        self._fetched_at = float("-inf")
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.fetches = 0
+        self.fetch_failures = 0
+        self.kid_miss_refetches = 0
+
+    async def _fetch(self) -> None:
+        try:
+            with timed_call("google", "oidc_discovery"):
+                async with httpx.AsyncClient(timeout=self.timeout_s) as http:
+                    r = await http.get(self.discovery_url)
+                    r.raise_for_status()
+                    metadata = r.json()
+                    r = await http.get(metadata["jwks_uri"])
+                    r.raise_for_status()
+                    jwks = r.json()
+        except Exception as e:
+            self.fetch_failures += 1
+            log.warning("OIDC metadata refresh failed: %s", e)
+            raise
+        self._metadata, self._jwks = metadata, jwks
+        self._fetched_at = time.monotonic()
+        self.fetches += 1
+
+    def _refresh(self) -> asyncio.Future:
+        """Start a fetch unless one is running; every caller awaits the same one."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = background_task(self._fetch())  # shared; callers time their own wait
+        return asyncio.shield(self._refresh_task)
+
+    def _stale(self) -> bool:
+        return time.monotonic() - self._fetched_at >= self.ttl_s
+
+    async def _ensure(self) -> None:
+        if self._metadata is None:
+            with span("google"):
+                await self._refresh()  # nothing cached yet: this request has to wait
+        elif self._stale():
+            # refresher is behind (or failing): serve what we have, refresh in the background
+            self._refresh().add_done_callback(lambda f: f.cancelled() or f.exception())  # logged in _fetch
+
+    async def metadata(self) -> dict:
+        await self._ensure()
+        return self._metadata
+
+    async def jwks(self, force: bool = False) -> dict:
+        if force:
+            running = self._refresh_task is not None and not self._refresh_task.done()
+            if running or time.monotonic() - self._fetched_at >= self.min_refetch_interval_s:
+                if not running:
+                    self.kid_miss_refetches += 1
+                with span("google"):
+                    await self._refresh()
+            return self._jwks
+        await self._ensure()
+        return self._jwks
+
+    async def run_refresher(self) -> None:
+        """Background task: prefetch now, then keep the cache fresh."""
+        while True:
+            try:
+                await self._refresh()
+                delay = self.ttl_s / 2
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                delay = min(30.0, self.ttl_s / 2)  # retry soon; already logged in _fetch
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "age_seconds": max(0.0, time.monotonic() - self._fetched_at) if self._metadata else None,
+            "fetches_total": self.fetches,
+            "fetch_failures_total": self.fetch_failures,
+            "kid_miss_refetches_total": self.kid_miss_refetches,
+        }
+
+google_oidc = OidcProviderCache(GOOGLE_DISCOVERY_URL, ttl_s=settings.GOOGLE_OIDC_CACHE_TTL_SECONDS)
@@ -0,0 +1,100 @@
+# app/services/jobs.py
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional, Set
+
+from app.timing import background_task
+
+log = logging.getLogger(__name__)
+
+class JobQueueFull(RuntimeError):
+    """Raised by JobRunner.submit when `max_pending` jobs are already queued or running."""
+
+class JobRunner:
+    """
+    In-process runner for fire-and-forget async jobs.
+
+    Jobs run on the event loop outside any request, at most `concurrency`
+    at a time. Each one gets `timeout_s` from submission (queueing
+    included), so no job outlives that deadline and a stuck upstream can't
+    pin a slot forever. At most `max_pending` jobs are held; beyond that
+    submit() raises JobQueueFull.
+
+    `on_failure` lets the caller record a job that didn't finish (e.g. mark
+    a row as failed): it runs when the job times out, raises, or is
+    cancelled at shutdown.
+    """
+
+    def __init__(self, concurrency: int = 4, timeout_s: float = 60.0, max_pending: int = 100):
+        self.timeout_s = timeout_s
+        self.max_pending = max_pending
+        self._sem = asyncio.Semaphore(concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+        self._closed = False
+        self.rejected = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    @property
+    def full(self) -> bool:
+        return len(self._tasks) >= self.max_pending
+
+    def submit(
+        self,
+        job: Callable[[], Awaitable[None]],
+        *,
+        name: str = "job",
+        on_failure: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> None:
+        if self._closed:
+            raise RuntimeError("JobRunner is shut down")
+        if self.full:
+            self.rejected += 1
+            raise JobQueueFull(f"{len(self._tasks)} jobs pending")
+        task = background_task(self._run(job, name, on_failure), name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_slot(self, job) -> None:
+        async with self._sem:
+            await job()
+
+    async def _run(self, job, name, on_failure) -> None:
+        try:
+            await asyncio.wait_for(self._run_slot(job), timeout=self.timeout_s)
+            return
+        except asyncio.TimeoutError:
+            log.warning("job %s timed out after %.1fs", name, self.timeout_s)
+        except asyncio.CancelledError:
+            log.warning("job %s cancelled", name)
+            if on_failure is not None:
+                await self._safe(on_failure, name)
+            raise
+        except Exception:
+            log.exception("job %s failed", name)
+        if on_failure is not None:
+            await self._safe(on_failure, name)
+
+    @staticmethod
+    async def _safe(cb, name) -> None:
+        try:
+            await cb()
+        except Exception:
+            log.exception("job %s failure handler failed", name)
+
+    async def shutdown(self, grace_s: float = 5.0) -> None:
+        """
+        Stop accepting jobs, give running ones `grace_s` to finish, cancel the
+        rest (their on_failure handlers still run).
+        """
+        self._closed = True
+        if not self._tasks:
+            return
+        _, still_running = await asyncio.wait(set(self._tasks), timeout=grace_s)
+        for t in still_running:
+            t.cancel()
+        await asyncio.gather(*still_running, return_exceptions=True)
@@ -0,0 +1,61 @@
+# app/services/multipart_cleanup.py
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import session_scope
+from app.models import DiscoveryArtifact
+from app.services.s3_service import abort_multipart_upload
+
+log = logging.getLogger(__name__)
+
+async def abort_stale_multipart_uploads(older_than: timedelta, limit: int = 100) -> int:
+    """
+    Abort multipart uploads started more than `older_than` ago and mark
+    their artifacts failed, so S3 stops billing for orphaned parts.
+    Returns how many were aborted.
+    """
+    cutoff = datetime.now(timezone.utc) - older_than
+    async with session_scope() as db:
+        stale = (await db.execute(
+            select(DiscoveryArtifact)
+            .where(
+                DiscoveryArtifact.multipart_upload_id.isnot(None),
+                DiscoveryArtifact.created_at < cutoff,
+            )
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )).scalars().all()
+
+        aborted = 0
+        for artifact in stale:
+            try:
+                await abort_multipart_upload(key=artifact.s3_key, upload_id=artifact.multipart_upload_id)
+            except Exception:
+                log.warning("could not abort multipart upload for %s", artifact.s3_key, exc_info=True)
+                continue
+            artifact.multipart_upload_id = None
+            artifact.status = "failed"
+            aborted += 1
+        await db.commit()
+    if aborted:
+        log.info("aborted %d stale multipart uploads", aborted)
+    return aborted
+
+async def run_multipart_cleanup(interval_seconds: int = 3600, initial_delay_seconds: int = 60) -> None:
+    """Background task: periodically abort incomplete uploads past S3_MULTIPART_STALE_HOURS."""
+    # Stay off the cold-start path: the first pass waits until the instance is serving.
+    await asyncio.sleep(initial_delay_seconds)
+    while True:
+        try:
+            await abort_stale_multipart_uploads(timedelta(hours=settings.S3_MULTIPART_STALE_HOURS))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.exception("multipart cleanup pass failed")
+        await asyncio.sleep(interval_seconds)
@@ -1,47 +1,420 @@
-from openai import AsyncOpenAI
 import asyncio
-from app.config import Settings
+import hashlib
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional
 
-settings = Settings()
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app import models
+from app.cache import TTLCache
+from app.config import settings
+from app.database import session_scope
+from app.metrics import timed_call
+from app.services.resilience import CircuitBreaker, LatencyTracker
+from app.timing import background_task, span
+
+log = logging.getLogger(__name__)
+
+# Returned instead of raising when the model can't be reached.
+OUTCOME_FALLBACK = "AI summary unavailable."
+
+OUTCOME_SYSTEM_PROMPT = (
+    "You are a concise product coach. "
+    "Given a project description, produce a 1–3 sentence outcome summary."
+)
+
+def _outcome_input(description: str) -> List[dict]:
+    user_prompt = (
+        f"Project description:\n{description.strip() or 'N/A'}\n\n"
+        "Return only the outcome summary."
+    )
+    return [
+        {"role": "system", "content": OUTCOME_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt},
+    ]
+
+def outcome_cache_key(model: str, system_prompt: str, description: str) -> str:
+    """Content address for an outcome: same model + prompt + description => same key."""
+    normalized = " ".join(description.split())
+    h = hashlib.sha256()
+    for part in (model, system_prompt, normalized):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+class OutcomeCache:
+    """
+    Memoizes generated outcomes. An in-memory LRU sits in front of an
+    optional Postgres table (ai_outcome_cache) shared by every instance.
+    Both tiers expire entries after `ttl_s`; the table is trimmed to
+    `db_max_rows` every `_TRIM_EVERY` writes. Postgres errors only cost a
+    cache miss, never the request.
+    """
+
+    _TRIM_EVERY = 100
+
+    def __init__(self, memory_entries: int, ttl_s: int, use_db: bool = False, db_max_rows: int = 100_000):
+        self.ttl_s = ttl_s
+        self.use_db = use_db
+        self.db_max_rows = db_max_rows
+        self._memory: TTLCache[str] = TTLCache(memory_entries, ttl_s)
+        self._db_writes = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self._memory.get(key)
+        if value is not None or not self.use_db:
+            return value
+        try:
+            async with session_scope() as db:
+                value = (await db.execute(
+                    select(models.AiOutcomeCache.outcome).where(
+                        models.AiOutcomeCache.key == key,
+                        models.AiOutcomeCache.expires_at > datetime.now(timezone.utc),
+                    )
+                )).scalar_one_or_none()
+        except Exception:
+            log.warning("outcome cache read failed", exc_info=True)
+            return None
+        if value is not None:
+            self._memory.set(key, value)
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        self._memory.set(key, value)
+        if not self.use_db:
+            return
+        now = datetime.now(timezone.utc)
+        stmt = pg_insert(models.AiOutcomeCache).values(
+            key=key, outcome=value, created_at=now, expires_at=now + timedelta(seconds=self.ttl_s),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.AiOutcomeCache.key],
+            set_={"outcome": stmt.excluded.outcome, "created_at": stmt.excluded.created_at,
+                  "expires_at": stmt.excluded.expires_at},
+        )
+        try:
+            async with session_scope() as db:
+                await db.execute(stmt)
+                self._db_writes += 1
+                if self._db_writes % self._TRIM_EVERY == 0:
+                    await self._trim(db, now)
+                await db.commit()
+        except Exception:
+            log.warning("outcome cache write failed", exc_info=True)
+
+    async def _trim(self, db, now: datetime) -> None:
+        t = models.AiOutcomeCache
+        await db.execute(delete(t).where(t.expires_at <= now))
+        overflow = select(t.key).order_by(t.created_at.desc()).offset(self.db_max_rows).scalar_subquery()
+        await db.execute(delete(t).where(t.key.in_(overflow)))
 
 class OpenAIService:
-    def __init__(self, model: str = "gpt-5-mini", timeout_s: float = 8.0, retries: int = 1):
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+    """
+    Outcome generation against the Responses API.
+
+    Identical in-flight requests share one upstream call (singleflight), and
+    at most `max_concurrency` calls run at once; callers wait for a slot up
+    to `queue_timeout_s` and then get the fallback instead of piling onto
+    the rate limit.
+
+    A circuit breaker fails fast to the fallback while the provider keeps
+    erroring. When `hedge` is on and the breaker is closed, a second
+    identical request is fired if the first hasn't answered within the
+    recent p95 latency and a concurrency slot is free, and whichever
+    finishes first wins.
+
+    `client` can be any object exposing `responses.create`, so a local fake
+    can stand in for the API. Without one, an AsyncOpenAI client (and the
+    openai package itself) is only loaded on the first model call; aclose()
+    releases it on shutdown.
+    """
+
+    def __init__(self, model: str = "gpt-5-mini", timeout_s: float = 8.0, retries: int = 1,
+                 cache: Optional[OutcomeCache] = None,
+                 max_concurrency: int = settings.OPENAI_MAX_CONCURRENCY,
+                 queue_timeout_s: float = settings.OPENAI_QUEUE_TIMEOUT_SECONDS,
+                 breaker: Optional[CircuitBreaker] = None,
+                 hedge: bool = settings.OPENAI_HEDGE,
+                 stream_idle_s: float = settings.OPENAI_STREAM_IDLE_SECONDS,
+                 stream_deadline_s: float = settings.OPENAI_STREAM_DEADLINE_SECONDS,
+                 client=None):
+        self._client = client
         self.model = model
         self.timeout_s = timeout_s
         self.retries = retries
+        self.stream_idle_s = stream_idle_s
+        self.stream_deadline_s = stream_deadline_s
+        self.max_concurrency = max_concurrency
+        self.queue_timeout_s = queue_timeout_s
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.in_flight = 0      # upstream calls currently running
+        self.queued = 0         # callers waiting for a slot
+        self.coalesced = 0      # callers that joined an existing call
+        self.queue_timeouts = 0
+        self.breaker = breaker or CircuitBreaker(
+            "openai",
+            failure_threshold=settings.OPENAI_BREAKER_FAILURES,
+            reset_timeout_s=settings.OPENAI_BREAKER_RESET_SECONDS,
+        )
+        self.hedge = hedge
+        self.latency = LatencyTracker()
+        self.hedges = 0
+        self.cache = cache or OutcomeCache(
+            memory_entries=settings.OPENAI_CACHE_MAX_ENTRIES,
+            ttl_s=settings.OPENAI_CACHE_TTL_SECONDS,
+            use_db=settings.OPENAI_CACHE_DB,
+            db_max_rows=settings.OPENAI_CACHE_DB_MAX_ROWS,
+        )
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import AsyncOpenAI  # heavy import; keep it off the startup path
+            self._client = AsyncOpenAI(api_key=settings.openai_api_key)
+        return self._client
+
+    @client.setter
+    def client(self, value) -> None:
+        self._client = value
+
+    async def aclose(self) -> None:
+        if self._client is not None and hasattr(self._client, "close"):
+            await self._client.close()
+        self._client = None
 
     async def _call_with_retry(self, func, *args, **kwargs):
-        last_err = None
-        for _ in range(self.retries + 1):
-            try:
-                return await asyncio.wait_for(func(*args, **kwargs), timeout=self.timeout_s)
-            except Exception as e:
-                last_err = e
+        for attempt in range(self.retries + 1):
+            # Open breaker (or a failed half-open probe): don't wait out the
+            # timeout, and don't sleep the backoff either.
+            if not self.breaker.allow():
+                break
+            if attempt:
                 await asyncio.sleep(0.2)
+            try:
+                result = await asyncio.wait_for(self._hedged(func, *args, **kwargs), timeout=self.timeout_s)
+            except Exception:
+                log.warning("OpenAI call failed", exc_info=True)
+                self.breaker.record_failure()
+                continue
+            self.breaker.record_success()
+            return result
         # fallback string on repeated failure
-        return "AI summary unavailable."
+        return OUTCOME_FALLBACK
+
+    async def _hedged(self, func, *args, **kwargs):
+        started = time.monotonic()
+        delay = self.latency.percentile(0.95) if self.hedge else None
+        if delay is None or self.breaker.state != CircuitBreaker.CLOSED:
+            result = await func(*args, **kwargs)
+            self.latency.record(time.monotonic() - started)
+            return result
+
+        tasks = {asyncio.ensure_future(func(*args, **kwargs))}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                hedge = await self._start_hedge(func, *args, **kwargs)
+                if hedge is not None:
+                    tasks.add(hedge)
+            last_err: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    if t.exception() is None:
+                        self.latency.record(time.monotonic() - started)
+                        return t.result()
+                    last_err = t.exception()
+            raise last_err
+        finally:
+            for t in tasks:
+                t.cancel()
+
+    async def _start_hedge(self, func, *args, **kwargs) -> Optional[asyncio.Future]:
+        """
+        Fire the hedge on a concurrency slot of its own, so hedging never
+        exceeds max_concurrency. Returns None (no hedge) if no slot is free.
+        """
+        if self._slots.locked():
+            return None
+        await self._slots.acquire()  # a permit is free: returns without suspending
+        self.hedges += 1
+        self.in_flight += 1
+        task = asyncio.ensure_future(func(*args, **kwargs))
+
+        def _release(_):
+            self.in_flight -= 1
+            self._slots.release()
+
+        task.add_done_callback(_release)
+        return task
+
+    @asynccontextmanager
+    async def _slot(self):
+        """Hold one concurrency slot; raises asyncio.TimeoutError after queue_timeout_s."""
+        self.queued += 1
+        try:
+            # A timeout scope, not wait_for: the acquire runs in this task, and
+            # Semaphore.acquire hands the permit back if it is cancelled after
+            # being granted, so a timeout racing a release can't leak a permit.
+            async with asyncio.timeout(self.queue_timeout_s):
+                await self._slots.acquire()
+        except TimeoutError:
+            self.queue_timeouts += 1
+            log.warning("OpenAI queue wait exceeded %.1fs", self.queue_timeout_s)
+            raise
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    async def _governed(self, func):
+        """Run `func` once a concurrency slot is free, or fall back after queue_timeout_s."""
+        try:
+            async with self._slot():
+                return await func()
+        except asyncio.TimeoutError:
+            return OUTCOME_FALLBACK
+
+    def _singleflight(self, key: str, factory) -> asyncio.Future:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            # Shared by every caller, so it must not charge the leader's request.
+            task = background_task(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: one caller going away must not cancel the others' shared call
+        return asyncio.shield(task)
+
+    def gauges(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_concurrency": self.max_concurrency,
+            "coalesced_total": self.coalesced,
+            "queue_timeouts_total": self.queue_timeouts,
+            "breaker_state": self.breaker.state,
+            "breaker_transitions_total": self.breaker.transitions,
+            "hedges_total": self.hedges,
+        }
 
     async def generate_outcome(self, description: str) -> str:
         """Summarize a project description into a short outcome statement."""
-        system_prompt = (
-            "You are a concise product coach. "
-            "Given a project description, produce a 1–3 sentence outcome summary."
-        )
-        user_prompt = (
-            f"Project description:\n{description.strip() or 'N/A'}\n\n"
-            "Return only the outcome summary."
-        )
+        key = outcome_cache_key(self.model, OUTCOME_SYSTEM_PROMPT, description)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return cached
 
         async def _call():
-            resp = await self.client.responses.create(
-                model=self.model,
-                input=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                max_output_tokens=500,
-            )
+            with timed_call("openai", "responses.create"):
+                resp = await self.client.responses.create(
+                    model=self.model,
+                    input=_outcome_input(description),
+                    max_output_tokens=500,
+                )
             return resp.output_text.strip()
 
-        return await self._call_with_retry(_call)
\ No newline at end of file
+        async def _generate():
+            outcome = await self._governed(lambda: self._call_with_retry(_call))
+            if not outcome:
+                return OUTCOME_FALLBACK  # an empty answer is no outcome
+            # Never memoize the fallback as if it were a result.
+            if outcome != OUTCOME_FALLBACK:
+                await self.cache.set(key, outcome)
+            return outcome
+
+        # Each caller, leader or not, is charged for the time it waited.
+        with span("openai"):
+            return await self._singleflight(key, _generate)
+
+    async def stream_outcome(self, description: str) -> AsyncIterator[str]:
+        """
+        Like generate_outcome, but yields text deltas as the model produces
+        them. A cache hit is yielded as a single chunk. If the call can't be
+        started (open breaker, queue timeout, upstream error) the fallback is
+        yielded instead; an error after text has been sent is re-raised.
+        Closing the generator early closes the upstream stream.
+        """
+        key = outcome_cache_key(self.model, OUTCOME_SYSTEM_PROMPT, description)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        if not self.breaker.allow():
+            yield OUTCOME_FALLBACK
+            return
+
+        # The upstream stream is read by a separate task, so the concurrency
+        # slot is held only as long as the model takes, never while a slow
+        # client drains the deltas.
+        deltas: asyncio.Queue = asyncio.Queue()
+        pump = asyncio.ensure_future(self._pump_stream(description, deltas))
+        parts: List[str] = []
+        try:
+            while (delta := await deltas.get()) is not None:
+                parts.append(delta)
+                yield delta
+            await pump
+        except Exception:
+            log.warning("OpenAI stream failed", exc_info=True)
+            if parts:
+                raise
+            yield OUTCOME_FALLBACK
+            return
+        finally:
+            pump.cancel()
+
+        outcome = "".join(parts).strip()
+        if outcome:
+            await self.cache.set(key, outcome)
+
+    async def _pump_stream(self, description: str, out: asyncio.Queue) -> None:
+        """
+        Copy one upstream stream's text deltas into `out`, then put None.
+        A stall longer than stream_idle_s or a stream outliving
+        stream_deadline_s raises TimeoutError and counts as a breaker failure.
+        """
+        called = False  # a queue timeout says nothing about provider health
+        try:
+            async with self._slot():
+                called = True
+                async with asyncio.timeout(self.stream_deadline_s):
+                    with timed_call("openai", "responses.create.stream_open"):  # time to first response
+                        stream = await asyncio.wait_for(
+                            self.client.responses.create(
+                                model=self.model,
+                                input=_outcome_input(description),
+                                max_output_tokens=500,
+                                stream=True,
+                            ),
+                            timeout=self.timeout_s,
+                        )
+                    events = stream.__aiter__()
+                    try:
+                        while True:
+                            try:
+                                event = await asyncio.wait_for(anext(events), timeout=self.stream_idle_s)
+                            except StopAsyncIteration:
+                                break
+                            if event.type == "response.output_text.delta":
+                                out.put_nowait(event.delta)
+                    finally:
+                        await stream.close()
+        except Exception:
+            if called:
+                self.breaker.record_failure()
+            raise
+        else:
+            self.breaker.record_success()
+        finally:
+            out.put_nowait(None)
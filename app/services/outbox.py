@@ -0,0 +1,117 @@
+# app/services/outbox.py
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import session_scope
+from app.models import DiscoveryArtifact, EventOutbox
+from app.services.event_bus import SQS_MAX_BATCH, artifact_uploaded_event, send_batch
+
+log = logging.getLogger(__name__)
+
+# Rows that keep failing are parked after this many tries (inspect last_error).
+MAX_ATTEMPTS = 10
+
+# Set by writers after commit so the local relay doesn't wait for its next poll.
+_wakeup = asyncio.Event()
+
+def artifact_uploaded_row(artifact: DiscoveryArtifact) -> dict:
+    """event_outbox column values for an ArtifactUploaded event (for bulk INSERTs)."""
+    return {
+        "event_type": "ArtifactUploaded",
+        "payload": artifact_uploaded_event(
+            s3_key=artifact.s3_key,
+            bucket=artifact.s3_bucket,
+            project_id=str(artifact.project_id) if artifact.project_id else None,
+            user_id=str(artifact.user_id) if artifact.user_id else None,
+            original_filename=artifact.original_filename,
+            content_type=artifact.content_type,
+            public_url=artifact.public_url or "",
+        ),
+    }
+
+def outbox_enabled() -> bool:
+    """Without a queue the relay never runs, so nothing should be written for it."""
+    return bool(settings.SQS_UPLOADS_QUEUE_URL)
+
+def enqueue_artifact_uploaded(db: AsyncSession, artifact: DiscoveryArtifact) -> None:
+    """
+    Stage an ArtifactUploaded event on `db`. It is written in the same
+    transaction as the artifact change and published later by the relay.
+    A no-op when no queue is configured.
+    """
+    if outbox_enabled():
+        db.add(EventOutbox(**artifact_uploaded_row(artifact)))
+
+def notify_relay() -> None:
+    _wakeup.set()
+
+async def relay_once(batch_size: int = 50) -> int:
+    """
+    Claim up to `batch_size` unsent rows, publish them and mark them sent.
+    Rows are locked with FOR UPDATE SKIP LOCKED, so several instances can
+    run the relay at once without double-claiming. Returns rows claimed.
+    """
+    async with session_scope() as db:
+        rows = (await db.execute(
+            select(EventOutbox)
+            .where(EventOutbox.sent_at.is_(None), EventOutbox.attempts < MAX_ATTEMPTS)
+            .order_by(EventOutbox.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )).scalars().all()
+        if not rows:
+            return 0
+
+        chunks = [rows[i:i + SQS_MAX_BATCH] for i in range(0, len(rows), SQS_MAX_BATCH)]
+        results = await asyncio.gather(*(send_batch([r.payload for r in chunk]) for chunk in chunks))
+        failed = {chunk[i].id for chunk, still_failed in zip(chunks, results) for i in still_failed}
+
+        now = datetime.now(timezone.utc)
+        for r in rows:
+            if r.id in failed:
+                r.attempts += 1
+                r.last_error = "SQS send failed"
+            else:
+                r.sent_at = now
+        await db.commit()
+        if failed:
+            log.warning("outbox: %d of %d events not sent", len(failed), len(rows))
+        return len(rows)
+
+async def run_relay(poll_interval_s: float = 1.0, batch_size: int = 50) -> None:
+    """Background task: drain the outbox, then wait for a wakeup or the next poll."""
+    while True:
+        try:
+            claimed = await relay_once(batch_size)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.exception("outbox relay pass failed")
+            claimed = 0
+        if claimed < batch_size:
+            _wakeup.clear()
+            try:
+                await asyncio.wait_for(_wakeup.wait(), poll_interval_s)
+            except asyncio.TimeoutError:
+                pass
+
+async def drain(timeout_s: float = 10.0, batch_size: int = 50) -> None:
+    """
+    Shutdown hook: publish what is still unsent, for up to `timeout_s`.
+    Anything left stays in the table for the next instance's relay.
+    """
+    try:
+        async with asyncio.timeout(timeout_s):
+            while await relay_once(batch_size) == batch_size:
+                pass
+    except TimeoutError:
+        log.warning("outbox: drain stopped after %.1fs; remaining events stay queued", timeout_s)
+    except Exception:
+        log.exception("outbox drain failed")
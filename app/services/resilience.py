@@ -0,0 +1,101 @@
+# app/services/resilience.py
+from __future__ import annotations
+
+import logging
+import math
+import time
+from collections import deque
+from typing import Callable, List, Optional
+
+log = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed    -> calls go through; `failure_threshold` failures in a row open it
+    open      -> calls are rejected until `reset_timeout_s` has passed
+    half_open -> up to `half_open_max_calls` probes go through; a success
+                 closes the breaker, a failure opens it again
+
+    Listeners registered with add_listener(cb) are called as
+    cb(name, old_state, new_state) on every transition.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout_s: float = 30.0,
+                 half_open_max_calls: int = 1, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self.state = self.CLOSED
+        self.transitions = 0
+        self._failures = 0
+        self._changed_at = clock()
+        self._probes = 0
+        self._listeners: List[Callable[[str, str, str], None]] = []
+
+    def add_listener(self, cb: Callable[[str, str, str], None]) -> None:
+        self._listeners.append(cb)
+
+    def _transition(self, new_state: str) -> None:
+        old, self.state = self.state, new_state
+        self._changed_at = self._clock()
+        self._probes = 0
+        self.transitions += 1
+        log.warning("circuit %s: %s -> %s", self.name, old, new_state)
+        for cb in self._listeners:
+            try:
+                cb(self.name, old, new_state)
+            except Exception:
+                log.exception("circuit %s listener failed", self.name)
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream right now (claims a probe slot when half-open)."""
+        elapsed = self._clock() - self._changed_at
+        if self.state == self.OPEN:
+            if elapsed < self.reset_timeout_s:
+                return False
+            self._transition(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            # A probe that never reported back (e.g. cancelled) must not wedge us here.
+            if self._probes >= self.half_open_max_calls and elapsed >= self.reset_timeout_s:
+                self._changed_at, self._probes = self._clock(), 0
+            if self._probes >= self.half_open_max_calls:
+                return False
+            self._probes += 1
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        if self.state != self.CLOSED:
+            self._transition(self.CLOSED)
+
+    def record_failure(self) -> None:
+        if self.state == self.HALF_OPEN:
+            self._transition(self.OPEN)
+            return
+        self._failures += 1
+        if self.state == self.CLOSED and self._failures >= self.failure_threshold:
+            self._transition(self.OPEN)
+
+class LatencyTracker:
+    """Rolling window of successful call latencies, for hedging delays."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: deque = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
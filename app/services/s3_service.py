@@ -5,14 +5,14 @@ import os
 import time
 import uuid
 from dataclasses import dataclass
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
-import boto3
-from botocore.config import Config as BotoConfig
 from botocore.exceptions import BotoCoreError, ClientError
 
 # expects a Settings object in app/config.py (see below)
 from app.config import settings  # type: ignore
+from app.services.aws import clients
+from app.metrics import timed_call
 
 
 SSE_ALGO = getattr(settings, "S3_SSE_ALGORITHM", "AES256")  # or "aws:kms"
@@ -32,20 +32,8 @@ class PresignedPost:
     public_url: str
 
 
-def _client():
-    return boto3.client(
-        "s3",
-        region_name=settings.AWS_REGION,
-        config=BotoConfig(
-            signature_version="s3v4",
-            retries={"max_attempts": 3, "mode": "standard"},
-            connect_timeout=5,
-            read_timeout=60,
-        ),
-    )
-
-
-_s3 = _client()
+async def _s3():
+    return await clients.get("s3")
 
 
 def build_object_key(
@@ -82,7 +70,7 @@ def _public_url(key: str) -> str:
     return f"https://{settings.S3_BUCKET}.s3.{settings.AWS_REGION}.amazonaws.com/{key}"
 
 
-def create_presigned_post(
+async def create_presigned_post(
     *, key: str, content_type: str,
     max_bytes: Optional[int] = None,
     expires_seconds: Optional[int] = None,
@@ -112,8 +100,9 @@ def create_presigned_post(
         conditions.append({"x-amz-server-side-encryption-aws-kms-key-id": KMS_KEY_ID})
         fields["x-amz-server-side-encryption-aws-kms-key-id"] = KMS_KEY_ID
 
+    s3 = await _s3()
     try:
-        resp = _s3.generate_presigned_post(
+        resp = await s3.generate_presigned_post(
             Bucket=settings.S3_BUCKET,
             Key=key,
             Fields=fields,
@@ -130,14 +119,16 @@ def create_presigned_post(
         public_url=_public_url(key),
     )
 
-def head_object(*, key: str) -> Dict[str, Any]:
+async def head_object(*, key: str) -> Dict[str, Any]:
     """
     Fetch object metadata without downloading it.
     Returns { content_length, content_type, etag, last_modified }
     Raises FileNotFoundError if the object doesn't exist.
     """
+    s3 = await _s3()
     try:
-        r = _s3.head_object(Bucket=settings.S3_BUCKET, Key=key)
+        with timed_call("s3", "head_object"):
+            r = await s3.head_object(Bucket=settings.S3_BUCKET, Key=key)
         return {
             "content_length": r.get("ContentLength"),
             "content_type": r.get("ContentType"),
@@ -151,3 +142,113 @@ def head_object(*, key: str) -> Dict[str, Any]:
         if code in ("404", "NoSuchKey", "NotFound"):
             raise FileNotFoundError(f"S3 object not found: {key}") from e
         raise RuntimeError(f"HEAD failed for {key}: {e}") from e
+
+# --- Multipart uploads ---------------------------------------------------
+
+S3_MIN_PART_SIZE = 5 * 1024 * 1024  # every part but the last must be at least this
+S3_MAX_PARTS = 10_000
+
+def multipart_layout(size_bytes: int, part_size: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Pick (part_size, part_count) for an object of `size_bytes`, growing the
+    configured part size if needed to stay under S3's 10,000-part limit.
+    """
+    part = max(part_size or settings.S3_MULTIPART_PART_SIZE, S3_MIN_PART_SIZE)
+    if size_bytes > part * S3_MAX_PARTS:
+        part = -(-size_bytes // S3_MAX_PARTS)
+    return part, max(1, -(-size_bytes // part))
+
+@dataclass(frozen=True)
+class MultipartUpload:
+    key: str
+    upload_id: str
+    public_url: str
+
+async def create_multipart_upload(
+    *, key: str, content_type: str,
+    server_side_encryption: str = SSE_ALGO,
+) -> MultipartUpload:
+    """Start a multipart upload (same SSE settings as presigned POSTs)."""
+    if content_type not in settings.S3_ALLOWED_CONTENT_TYPES:
+        raise ValueError(f"Disallowed content type: {content_type}")
+    _assert_under_prefix(key)
+
+    params: Dict[str, Any] = {
+        "Bucket": settings.S3_BUCKET,
+        "Key": key,
+        "ContentType": content_type,
+        "ServerSideEncryption": server_side_encryption,
+    }
+    if server_side_encryption == "aws:kms" and KMS_KEY_ID:
+        params["SSEKMSKeyId"] = KMS_KEY_ID
+    s3 = await _s3()
+    try:
+        upload_id = (await s3.create_multipart_upload(**params))["UploadId"]
+    except (ClientError, BotoCoreError) as e:
+        raise RuntimeError(f"Failed to start multipart upload: {e}") from e
+    return MultipartUpload(key=key, upload_id=upload_id, public_url=_public_url(key))
+
+async def presign_upload_part(
+    *, key: str, upload_id: str, part_number: int,
+    expires_seconds: Optional[int] = None,
+) -> str:
+    """Presigned PUT URL for one part. Clients must read the ETag response header."""
+    if not 1 <= part_number <= S3_MAX_PARTS:
+        raise ValueError(f"part_number must be between 1 and {S3_MAX_PARTS}")
+    s3 = await _s3()
+    return await s3.generate_presigned_url(
+        "upload_part",
+        Params={"Bucket": settings.S3_BUCKET, "Key": key, "UploadId": upload_id, "PartNumber": part_number},
+        ExpiresIn=expires_seconds or settings.S3_PRESIGN_EXPIRES,
+    )
+
+async def list_uploaded_parts(*, key: str, upload_id: str) -> List[Dict[str, Any]]:
+    """Parts S3 already has for this upload: [{part_number, etag, size}] (for resuming)."""
+    parts: List[Dict[str, Any]] = []
+    kwargs: Dict[str, Any] = {"Bucket": settings.S3_BUCKET, "Key": key, "UploadId": upload_id}
+    s3 = await _s3()
+    try:
+        while True:
+            r = await s3.list_parts(**kwargs)
+            parts.extend(
+                {"part_number": p["PartNumber"], "etag": p["ETag"], "size": p["Size"]}
+                for p in r.get("Parts", [])
+            )
+            if not r.get("IsTruncated"):
+                return parts
+            kwargs["PartNumberMarker"] = r["NextPartNumberMarker"]
+    except ClientError as e:
+        code = e.response.get("Error", {}).get("Code")
+        if code == "NoSuchUpload":
+            raise FileNotFoundError(f"Multipart upload not found: {key}") from e
+        raise RuntimeError(f"ListParts failed for {key}: {e}") from e
+
+async def complete_multipart_upload(*, key: str, upload_id: str, parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Stitch uploaded parts together. `parts` is [{part_number, etag}].
+    Returns { etag }. Raises ValueError if S3 rejects the part list.
+    """
+    ordered = sorted(parts, key=lambda p: p["part_number"])
+    s3 = await _s3()
+    try:
+        r = await s3.complete_multipart_upload(
+            Bucket=settings.S3_BUCKET,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": [{"PartNumber": p["part_number"], "ETag": p["etag"]} for p in ordered]},
+        )
+    except ClientError as e:
+        code = e.response.get("Error", {}).get("Code")
+        if code in ("InvalidPart", "InvalidPartOrder", "EntityTooSmall", "NoSuchUpload"):
+            raise ValueError(f"Cannot complete upload for {key}: {code}") from e
+        raise RuntimeError(f"CompleteMultipartUpload failed for {key}: {e}") from e
+    return {"etag": r.get("ETag")}
+
+async def abort_multipart_upload(*, key: str, upload_id: str) -> None:
+    """Abort an upload and free its stored parts. Already-gone uploads are ignored."""
+    s3 = await _s3()
+    try:
+        await s3.abort_multipart_upload(Bucket=settings.S3_BUCKET, Key=key, UploadId=upload_id)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "NoSuchUpload":
+            raise RuntimeError(f"AbortMultipartUpload failed for {key}: {e}") from e
@@ -0,0 +1,197 @@
+# app/timing.py
+"""
+Per-request timing breakdown.
+
+TimingMiddleware puts a RequestTimings in a contextvar for the length of a
+request. span() and record() add time under a name (auth, db, s3, sqs,
+openai, render); DB statements are counted through SQLAlchemy cursor events
+(see instrument_engine). Work that outlives or is shared between requests
+runs under background_task(), so it never adds to any request's timings. The totals go out as a Server-Timing header and
+one structured log line per request.
+
+Profiling is opt-in: with PROFILE_SAMPLE_RATE > 0 and pyinstrument
+installed, a sampled request is profiled and, if it took at least
+PROFILE_SLOW_MS, written to PROFILE_DIR as a speedscope flame graph.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import os
+import random
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+import orjson
+from sqlalchemy import event
+
+from app.config import settings
+
+try:  # optional: only needed when profiling is turned on
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:  # pragma: no cover
+    Profiler = None
+
+log = logging.getLogger(__name__)
+
+class RequestTimings:
+    __slots__ = ("spans", "recorded")
+
+    def __init__(self):
+        self.spans: Dict[str, List[float]] = {}  # name -> [count, seconds]
+        self.recorded = 0.0  # sum over all spans, so span() can subtract nested ones
+
+    def add(self, name: str, seconds: float) -> None:
+        self.recorded += seconds
+        s = self.spans.get(name)
+        if s is None:
+            self.spans[name] = [1, seconds]
+        else:
+            s[0] += 1
+            s[1] += seconds
+
+    def header(self, total_s: float) -> str:
+        parts = [f'{name};dur={s[1] * 1000:.1f};desc="{s[0]}x"' for name, s in self.spans.items()]
+        parts.append(f"total;dur={total_s * 1000:.1f}")
+        return ", ".join(parts)
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+def record(name: str, seconds: float) -> None:
+    """Add `seconds` under `name` to the current request, if there is one."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+class span:
+    """
+    `with span("auth"): ...` times the block into the current request.
+    Time recorded by nested spans meanwhile (e.g. the "db" of a lookup inside
+    "auth") is left out, so it isn't counted twice.
+    """
+
+    __slots__ = ("name", "_started", "_nested_before")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        timings = _current.get()
+        self._nested_before = timings.recorded if timings is not None else 0.0
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._started
+        timings = _current.get()
+        if timings is not None:
+            nested = timings.recorded - self._nested_before
+            timings.add(self.name, max(0.0, elapsed - nested))
+        return False
+
+def background_task(coro, *, name: Optional[str] = None) -> asyncio.Task:
+    """
+    asyncio.create_task, minus the current request's timings: a task created
+    during a request would otherwise inherit its contextvar and keep adding
+    to it, even after the response has been sent.
+    """
+    ctx = contextvars.copy_context()
+    ctx.run(_current.set, None)
+    return asyncio.create_task(coro, name=name, context=ctx)
+
+def instrument_engine(engine) -> None:
+    """Count and time every statement run on `engine` (an AsyncEngine) as the "db" span."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("timing_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["timing_started"].pop()
+        record("db", time.perf_counter() - started)
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def _failed(ctx):
+        # failed statements never reach after_cursor_execute; drop their start time
+        stack = ctx.connection.info.get("timing_started") if ctx.connection is not None else None
+        if stack:
+            record("db", time.perf_counter() - stack.pop())
+
+# --- Profiling ------------------------------------------------------------
+
+_profiling = False  # one profiled request at a time per process
+
+def _start_profiler():
+    global _profiling
+    if (Profiler is None or _profiling or settings.PROFILE_SAMPLE_RATE <= 0
+            or random.random() >= settings.PROFILE_SAMPLE_RATE):
+        return None
+    profiler = Profiler(async_mode="enabled")
+    profiler.start()
+    _profiling = True
+    return profiler
+
+def _write_profile(path: str, data: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(data)
+
+async def _finish_profiler(profiler, method: str, route: str, total_s: float) -> None:
+    global _profiling
+    profiler.stop()
+    _profiling = False
+    if total_s * 1000 < settings.PROFILE_SLOW_MS:
+        return
+    name = f"{int(time.time() * 1000)}-{method}-{route.strip('/').replace('/', '_') or 'root'}.speedscope.json"
+    path = os.path.join(settings.PROFILE_DIR, name)
+    await asyncio.to_thread(_write_profile, path, profiler.output(renderer=SpeedscopeRenderer()))
+    log.info("profile written to %s (%.0f ms)", path, total_s * 1000)
+
+_TIMING_ALLOW_ORIGIN = settings.FRONTEND_ORIGIN.encode("latin-1")  # lets the frontend read Server-Timing
+
+class TimingMiddleware:
+    """Pure ASGI middleware: Server-Timing header, request log line and optional profiling."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        profiler = _start_profiler()
+        started = time.perf_counter()
+        status = 500
+
+        async def _send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # Spans finished by now; anything after (streamed bodies) is only in the log line.
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"server-timing", timings.header(time.perf_counter() - started).encode("latin-1")),
+                    (b"timing-allow-origin", _TIMING_ALLOW_ORIGIN),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            total_s = time.perf_counter() - started
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            log.info("request %s", orjson.dumps({
+                "method": scope["method"],
+                "route": route,
+                "status": status,
+                "ms": round(total_s * 1000, 1),
+                "spans": {name: {"count": s[0], "ms": round(s[1] * 1000, 1)} for name, s in timings.spans.items()},
+            }).decode())
+            if profiler is not None:
+                await _finish_profiler(profiler, scope["method"], route, total_s)
@@ -0,0 +1,96 @@
+"""
+Compare the old ORM read path for /projects/api/list (select(Project) +
+selectinload("*"), then ProjectOut validation) with the column projection
+in app/queries.py.
+
+Runs against an in-memory SQLite copy of the schema, so it needs no
+Postgres or AWS credentials:
+
+    python -m bench.bench_project_reads --projects 500 --artifacts 20
+
+Reports median latency per call, plus tracemalloc peak memory and the
+blocks still held by the response objects.
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+import uuid
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, selectinload
+
+from app import models, queries, schemas
+
+def _seed(engine, n_projects: int, n_artifacts: int) -> uuid.UUID:
+    owner = uuid.uuid4()
+    with engine.begin() as conn:
+        conn.execute(insert(models.User).values(id=owner, email="bench@example.com"))
+        projects = [
+            dict(id=uuid.uuid4(), name=f"project {i}", status="active", owner_id=owner,
+                 description="lorem ipsum " * 20, project_outcome="outcome " * 10, outcome_status="ready")
+            for i in range(n_projects)
+        ]
+        conn.execute(insert(models.Project), projects)
+        artifacts = [
+            dict(s3_key=f"uploads/{p['id']}/{j}", project_id=p["id"], user_id=owner,
+                 original_filename=f"f{j}.pdf", content_type="application/pdf", s3_bucket="bench")
+            for p in projects for j in range(n_artifacts)
+        ]
+        if artifacts:
+            conn.execute(insert(models.DiscoveryArtifact), artifacts)
+    return owner
+
+def orm_path(engine, owner, limit):
+    with Session(engine) as db:
+        rows = db.execute(
+            select(models.Project)
+            .where(models.Project.status == "active", models.Project.owner_id == owner)
+            .order_by(models.Project.created.desc(), models.Project.id.desc())
+            .limit(limit)
+            .options(selectinload("*"))
+        ).scalars().all()
+        return [schemas.ProjectOut.model_validate(p, from_attributes=True) for p in rows]
+
+def projection_path(engine, owner, limit):
+    with Session(engine) as db:
+        rows = db.execute(queries.active_projects_page(owner, limit)).all()
+        return [schemas.ProjectOut.model_validate(dict(r._mapping)) for r in rows]
+
+def measure(fn, *args, runs: int):
+    fn(*args)  # warm up statement caches
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    result = fn(*args)  # keep the response objects alive for the snapshot
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    return statistics.median(times), blocks, peak
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--projects", type=int, default=500)
+    ap.add_argument("--artifacts", type=int, default=20, help="artifacts per project")
+    ap.add_argument("--limit", type=int, default=200, help="page size")
+    ap.add_argument("--runs", type=int, default=50)
+    args = ap.parse_args()
+
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(
+        engine, tables=[models.User.__table__, models.Project.__table__, models.DiscoveryArtifact.__table__],
+    )
+    owner = _seed(engine, args.projects, args.artifacts)
+
+    print(f"{'path':<12} {'median ms':>10} {'retained blocks':>16} {'peak KiB':>10}")
+    for name, fn in (("orm", orm_path), ("projection", projection_path)):
+        median, blocks, peak = measure(fn, engine, owner, args.limit, runs=args.runs)
+        print(f"{name:<12} {median * 1000:>10.2f} {blocks:>16} {peak / 1024:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Measure cold-start cost: `import app.main`, lifespan startup, and the
+first request, each in a fresh interpreter (like a new App Runner
+instance), repeated and reported as medians:
+
+    python -m bench.bench_startup --runs 10
+
+Needs no database or AWS: the engine is created lazily and never
+connects, and the first requests (`/` and `/projects/api/list` without
+a cookie, a 401) don't touch either. Also lists the slowest top-level
+imports from `python -X importtime`. Run it on two commits to compare.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+ENV = {
+    "DATABASE_URL": "postgresql+asyncpg://bench@127.0.0.1:1/bench",  # never connected to
+    "GOOGLE_CLIENT_ID": "bench", "GOOGLE_CLIENT_SECRET": "bench",
+    "GOOGLE_REDIRECT_URL": "http://testserver/auth/google/callback",
+    "SESSION_SECRET": "bench-session-secret", "SECRET_KEY": "bench-secret-key",
+    "OPENAI_API_KEY": "bench", "S3_BUCKET": "bench-bucket",
+}
+
+# Runs in the child interpreter; prints one JSON line of timings in ms.
+_PROBE = r"""
+import asyncio, json, time
+t0 = time.perf_counter()
+from app.main import app
+t_import = time.perf_counter()
+import httpx
+
+async def main():
+    out = {"import_ms": (t_import - t0) * 1000}
+    started = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        out["startup_ms"] = (time.perf_counter() - started) * 1000
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as c:
+            for name, path in (("first_root_ms", "/"), ("first_api_ms", "/projects/api/list")):
+                started = time.perf_counter()
+                await c.get(path)
+                out[name] = (time.perf_counter() - started) * 1000
+    out["total_ms"] = (time.perf_counter() - t0) * 1000
+    print(json.dumps(out))
+
+asyncio.run(main())
+"""
+
+def _child_env() -> dict:
+    env = dict(os.environ)
+    env.pop("SQS_UPLOADS_QUEUE_URL", None)  # no outbox relay polling the (absent) DB
+    env.update(ENV)
+    return env
+
+def probe_once() -> dict:
+    r = subprocess.run([sys.executable, "-c", _PROBE], capture_output=True, text=True, env=_child_env(), check=True)
+    return json.loads(r.stdout.strip().splitlines()[-1])
+
+def slowest_imports(top: int) -> list:
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                       capture_output=True, text=True, env=_child_env(), check=True)
+    cumulative = defaultdict(int)
+    for line in r.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        _, cum_us, name = line[len("import time:"):].split("|")
+        name = name[1:]  # nested imports are indented further
+        if not name.startswith(" ") and "." not in name:  # top-level packages only
+            cumulative[name] = max(cumulative[name], int(cum_us))
+    ranked = sorted(cumulative.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return [{"module": name, "cumulative_ms": round(us / 1000, 1)} for name, us in ranked]
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=7)
+    ap.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = ap.parse_args()
+
+    samples = [probe_once() for _ in range(args.runs)]
+    report = {
+        "runs": args.runs,
+        "median": {k: round(statistics.median(s[k] for s in samples), 1) for k in samples[0]},
+        "slowest_imports": slowest_imports(args.top),
+    }
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Pick argon2 cost parameters for a target per-hash latency on this machine.
+
+For each memory cost, raises time_cost until the median hash time reaches
+the target, then prints the cheapest setting that meets it as
+ARGON2_* environment variables for app/config.py:
+
+    python -m bench.calibrate_argon2 --target-ms 60 --parallelism 4
+
+Run it on the same instance type as production; hashes are timed in this
+process, the same way a PasswordHasherPool worker runs them.
+"""
+import argparse
+import statistics
+import time
+
+from passlib.hash import argon2
+
+def _median_ms(hasher, rounds: int) -> float:
+    hasher.hash("warm-up")
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        hasher.hash("calibration-password")
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def calibrate(target_ms: float, memory_costs, parallelism: int, max_time_cost: int, rounds: int):
+    results = []
+    for memory_cost in memory_costs:
+        for time_cost in range(1, max_time_cost + 1):
+            hasher = argon2.using(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+            ms = _median_ms(hasher, rounds)
+            print(f"memory_cost={memory_cost:>7} KiB  time_cost={time_cost:>2}  median={ms:7.1f} ms")
+            if ms >= target_ms:
+                results.append((memory_cost, time_cost, ms))
+                break
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-ms", type=float, default=50.0)
+    parser.add_argument("--memory-costs", type=int, nargs="+", default=[19456, 32768, 65536, 131072],
+                        help="KiB values to try (19456 is the OWASP minimum for argon2id)")
+    parser.add_argument("--parallelism", type=int, default=4)
+    parser.add_argument("--max-time-cost", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=7)
+    args = parser.parse_args()
+
+    results = calibrate(args.target_ms, args.memory_costs, args.parallelism, args.max_time_cost, args.rounds)
+    if not results:
+        print(f"\nNo setting reached {args.target_ms} ms; raise --max-time-cost or --memory-costs.")
+        return
+    # Prefer more memory (harder to attack on GPUs) unless it overshoots the target by 50%.
+    near = [r for r in results if r[2] <= args.target_ms * 1.5]
+    memory_cost, time_cost, ms = max(near, key=lambda r: r[0]) if near else min(results, key=lambda r: r[2])
+    print(f"\n# ~{ms:.0f} ms per hash")
+    print(f"ARGON2_TIME_COST={time_cost}")
+    print(f"ARGON2_MEMORY_COST={memory_cost}")
+    print(f"ARGON2_PARALLELISM={args.parallelism}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+In-memory stand-ins for S3, SQS and OpenAI, used by bench/run.py.
+
+They implement just the client calls the app makes, with the same
+response shapes, and sleep for a configurable latency on every call that
+would go over the network (presigning is local, so it doesn't).
+"""
+import asyncio
+import itertools
+import uuid
+from types import SimpleNamespace
+
+from botocore.exceptions import ClientError
+
+def _client_error(code: str, operation: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, operation)
+
+class FakeS3:
+    """Objects "exist" as soon as they are presigned, as if the browser uploaded them at once."""
+
+    def __init__(self, latency_s: float = 0.02, object_size: int = 256 * 1024):
+        self.latency_s = latency_s
+        self.object_size = object_size
+        self.objects = {}  # key -> size
+        self.uploads = {}  # upload_id -> key
+        self.calls = 0
+
+    async def _network(self):
+        self.calls += 1
+        await asyncio.sleep(self.latency_s)
+
+    async def generate_presigned_post(self, Bucket, Key, Fields, Conditions, ExpiresIn):
+        self.objects[Key] = self.object_size
+        return {"url": f"https://{Bucket}.s3.local/", "fields": {**Fields, "key": Key, "policy": "fake"}}
+
+    async def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://{Params['Bucket']}.s3.local/{Params['Key']}?partNumber={Params.get('PartNumber')}"
+
+    async def head_object(self, Bucket, Key):
+        await self._network()
+        if Key not in self.objects:
+            raise _client_error("404", "HeadObject")
+        return {
+            "ContentLength": self.objects[Key],
+            "ContentType": "application/pdf",
+            "ETag": f'"{uuid.uuid5(uuid.NAMESPACE_URL, Key).hex}"',
+            "LastModified": None,
+        }
+
+    async def create_multipart_upload(self, Bucket, Key, **kwargs):
+        await self._network()
+        upload_id = uuid.uuid4().hex
+        self.uploads[upload_id] = Key
+        return {"UploadId": upload_id}
+
+    async def list_parts(self, Bucket, Key, UploadId, **kwargs):
+        await self._network()
+        if UploadId not in self.uploads:
+            raise _client_error("NoSuchUpload", "ListParts")
+        return {"Parts": [], "IsTruncated": False}
+
+    async def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        await self._network()
+        if self.uploads.pop(UploadId, None) is None:
+            raise _client_error("NoSuchUpload", "CompleteMultipartUpload")
+        self.objects[Key] = self.object_size
+        return {"ETag": f'"{UploadId}-{len(MultipartUpload["Parts"])}"'}
+
+    async def abort_multipart_upload(self, Bucket, Key, UploadId):
+        await self._network()
+        if self.uploads.pop(UploadId, None) is None:
+            raise _client_error("NoSuchUpload", "AbortMultipartUpload")
+
+class FakeSqs:
+    def __init__(self, latency_s: float = 0.02):
+        self.latency_s = latency_s
+        self.messages = 0
+        self.calls = 0
+
+    async def send_message_batch(self, QueueUrl, Entries):
+        self.calls += 1
+        await asyncio.sleep(self.latency_s)
+        self.messages += len(Entries)
+        return {"Successful": [{"Id": e["Id"]} for e in Entries], "Failed": []}
+
+class _FakeStream:
+    def __init__(self, words, delay_s):
+        self._words = iter(words)
+        self._delay_s = delay_s
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        word = next(self._words, None)
+        if word is None:
+            raise StopAsyncIteration
+        await asyncio.sleep(self._delay_s)
+        return SimpleNamespace(type="response.output_text.delta", delta=word)
+
+    async def close(self):
+        pass
+
+class _FakeResponses:
+    def __init__(self, owner):
+        self._owner = owner
+
+    async def create(self, *, model, input, max_output_tokens, stream=False):
+        owner = self._owner
+        owner.calls += 1
+        n = next(owner._counter)
+        words = [f"Outcome {n}: ", "ship ", "the ", "thing ", "users ", "asked ", "for."]
+        if stream:
+            await asyncio.sleep(owner.first_token_s)
+            return _FakeStream(words, (owner.latency_s - owner.first_token_s) / len(words))
+        await asyncio.sleep(owner.latency_s)
+        return SimpleNamespace(output_text="".join(words))
+
+class FakeOpenAI:
+    """Drop-in for AsyncOpenAI's `responses.create` (plain and streaming)."""
+
+    def __init__(self, latency_s: float = 0.8, first_token_s: float = 0.2):
+        self.latency_s = latency_s
+        self.first_token_s = min(first_token_s, latency_s)
+        self.calls = 0
+        self._counter = itertools.count()
+        self.responses = _FakeResponses(self)
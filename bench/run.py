@@ -0,0 +1,254 @@
+"""
+Load-test app.main:app in-process at a fixed concurrency.
+
+The app runs with its real lifespan behind httpx's ASGITransport, so
+there's no server and no network hop. Postgres is real: pass
+--database-url (a dedicated, throwaway database; its tables are dropped
+and recreated), or leave it out to start an embedded server with
+`pgserver` if that package is installed. S3, SQS and OpenAI are replaced
+by the in-memory fakes in bench/fakes.py with configurable latency.
+
+    python -m bench.run --database-url postgresql+asyncpg://postgres@localhost/logima_bench \\
+        --concurrency 32 --duration 30 --mix default --out before.json
+
+Each virtual user registers and logs in once (not measured), then
+repeatedly picks a weighted operation from the mix. The report has
+p50/p95/p99 latency, error counts and requests per second, per operation
+and overall, as JSON (stdout, or --out), tagged with the git commit.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+MIXES = {
+    # operation -> weight
+    "default": {
+        "list_projects": 35, "get_project": 20, "create_project": 10, "update_project": 5,
+        "me": 10, "presign_confirm": 12, "confirm_batch": 3, "login": 5,
+    },
+    "reads": {"list_projects": 60, "get_project": 30, "me": 10},
+    "writes": {"create_project": 40, "update_project": 20, "presign_confirm": 30, "confirm_batch": 10},
+    "auth": {"login": 70, "me": 30},
+}
+
+PASSWORD = "bench-password-1"
+
+def _percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[idx]
+
+def _summary(latencies, errors: int, elapsed_s: float) -> dict:
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed_s, 1) if elapsed_s else 0.0,
+        "p50_ms": round(_percentile(values, 0.50) * 1000, 2),
+        "p95_ms": round(_percentile(values, 0.95) * 1000, 2),
+        "p99_ms": round(_percentile(values, 0.99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+    }
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def _database_url(args) -> str:
+    if args.database_url:
+        return args.database_url
+    try:
+        import pgserver
+    except ImportError:
+        sys.exit("No --database-url given and pgserver is not installed (pip install pgserver).")
+    # a fresh cluster per run, removed again when the process exits
+    server = pgserver.get_server(tempfile.mkdtemp(prefix="logima-bench-pg-"), cleanup_mode="delete")
+    return server.get_uri().replace("postgresql://", "postgresql+asyncpg://", 1)
+
+def _configure_env(database_url: str) -> None:
+    """Must run before anything imports app.*: settings are read at import time."""
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["SQS_UPLOADS_QUEUE_URL"] = "https://sqs.local/000000000000/bench-uploads"
+    os.environ["ENV"] = "bench"
+    for name, value in {
+        "GOOGLE_CLIENT_ID": "bench", "GOOGLE_CLIENT_SECRET": "bench",
+        "GOOGLE_REDIRECT_URL": "http://testserver/auth/google/callback",
+        "SESSION_SECRET": "bench-session-secret", "SECRET_KEY": "bench-secret-key",
+        "OPENAI_API_KEY": "bench", "S3_BUCKET": "bench-bucket",
+        "AWS_ACCESS_KEY_ID": "bench", "AWS_SECRET_ACCESS_KEY": "bench",
+    }.items():
+        os.environ.setdefault(name, value)
+
+class VirtualUser:
+    def __init__(self, client, rng: random.Random):
+        self.client = client
+        self.rng = rng
+        self.email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+        self.user_id = None
+        self.project_ids = []
+
+    def _csrf(self) -> dict:
+        return {"X-CSRF-Token": self.client.cookies.get("csrf_token", "")}
+
+    async def setup(self) -> None:
+        r = await self.client.post("/auth/register", json={"email": self.email, "password": PASSWORD})
+        r.raise_for_status()
+        self.user_id = r.json()["id"]
+        await self.login()
+        for _ in range(3):
+            await self.create_project()
+
+    async def login(self):
+        return await self.client.post("/auth/login", json={"email": self.email, "password": PASSWORD})
+
+    async def me(self):
+        return await self.client.get("/auth/me")
+
+    async def list_projects(self):
+        return await self.client.get("/projects/api/list", params={"limit": 50})
+
+    async def get_project(self):
+        return await self.client.get(f"/projects/api/{self.rng.choice(self.project_ids)}")
+
+    async def create_project(self):
+        r = await self.client.post(
+            "/projects/api/create",
+            json={"name": f"project {uuid.uuid4().hex[:8]}", "status": "active",
+                  # unique text, so every create reaches the (fake) model
+                  "description": f"Help teams {uuid.uuid4().hex} ship faster."},
+            headers=self._csrf(),
+        )
+        if r.status_code == 201:
+            self.project_ids.append(r.json()["id"])
+        return r
+
+    async def update_project(self):
+        return await self.client.patch(
+            f"/projects/api/{self.rng.choice(self.project_ids)}",
+            json={"name": f"renamed {uuid.uuid4().hex[:8]}"},
+            headers=self._csrf(),
+        )
+
+    async def _presign(self) -> str:
+        r = await self.client.post("/uploads/presign-post", params={
+            "filename": "notes.pdf", "content_type": "application/pdf",
+            "project_id": self.rng.choice(self.project_ids), "user_id": self.user_id,
+        })
+        r.raise_for_status()
+        return r.json()["upload"]["key"]
+
+    async def presign_confirm(self):
+        key = await self._presign()
+        return await self.client.post("/uploads/confirm", params={"key": key})
+
+    async def confirm_batch(self):
+        keys = [await self._presign() for _ in range(5)]
+        return await self.client.post("/uploads/confirm-batch", json={"keys": keys})
+
+async def _worker(user: VirtualUser, mix: dict, deadline: float, results: dict) -> None:
+    ops, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        op = user.rng.choices(ops, weights)[0]
+        started = time.perf_counter()
+        try:
+            r = await getattr(user, op)()
+            ok = r.status_code < 400
+        except Exception:
+            ok = False
+        latencies, errors = results.setdefault(op, ([], [0]))
+        latencies.append(time.perf_counter() - started)
+        if not ok:
+            errors[0] += 1
+
+async def run(args) -> dict:
+    import httpx
+
+    from app import models
+    from app.database import get_engine
+    from app.main import app
+    from app.routers import projects
+    from app.services.aws import clients as aws_clients
+    from bench.fakes import FakeOpenAI, FakeS3, FakeSqs
+
+    engine = await get_engine()
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+
+    s3, sqs = FakeS3(latency_s=args.aws_latency_ms / 1000), FakeSqs(latency_s=args.aws_latency_ms / 1000)
+    oai = FakeOpenAI(latency_s=args.openai_latency_ms / 1000)
+    aws_clients.override("s3", s3)
+    aws_clients.override("sqs", sqs)
+    projects.oai_service.client = oai
+
+    rng = random.Random(args.seed)
+    results: dict = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        clients = [httpx.AsyncClient(transport=transport, base_url="http://testserver")
+                   for _ in range(args.concurrency)]
+        try:
+            users = [VirtualUser(c, random.Random(rng.random())) for c in clients]
+            await asyncio.gather(*(u.setup() for u in users))
+            if args.warmup:
+                await asyncio.gather(*(_worker(u, MIXES[args.mix], time.perf_counter() + args.warmup, {})
+                                       for u in users))
+            started = time.perf_counter()
+            deadline = started + args.duration
+            await asyncio.gather(*(_worker(u, MIXES[args.mix], deadline, results) for u in users))
+            elapsed = time.perf_counter() - started
+        finally:
+            await asyncio.gather(*(c.aclose() for c in clients))
+
+    all_latencies = [t for lat, _ in results.values() for t in lat]
+    all_errors = sum(err[0] for _, err in results.values())
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "config": {
+            "mix": args.mix, "concurrency": args.concurrency, "duration_s": args.duration,
+            "aws_latency_ms": args.aws_latency_ms, "openai_latency_ms": args.openai_latency_ms,
+            "seed": args.seed,
+        },
+        "overall": _summary(all_latencies, all_errors, elapsed),
+        "operations": {op: _summary(lat, err[0], elapsed) for op, (lat, err) in sorted(results.items())},
+        "fakes": {"s3_calls": s3.calls, "sqs_messages": sqs.messages, "openai_calls": oai.calls},
+    }
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--database-url", help="postgresql+asyncpg:// URL of a throwaway database")
+    ap.add_argument("--mix", choices=sorted(MIXES), default="default")
+    ap.add_argument("--concurrency", type=int, default=16, help="virtual users")
+    ap.add_argument("--duration", type=float, default=20.0, help="measured seconds")
+    ap.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds before the run")
+    ap.add_argument("--aws-latency-ms", type=float, default=20.0)
+    ap.add_argument("--openai-latency-ms", type=float, default=800.0)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = ap.parse_args()
+
+    _configure_env(_database_url(args))
+    report = asyncio.run(run(args))
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+-- Track background generation of projects.project_outcome.
+-- Existing rows already have their outcome, so backfill them as 'ready'.
+ALTER TABLE projects
+    ADD COLUMN IF NOT EXISTS outcome_status VARCHAR NOT NULL DEFAULT 'ready';
+ALTER TABLE projects
+    ALTER COLUMN outcome_status SET DEFAULT 'pending';
+ALTER TABLE projects
+    ADD CONSTRAINT chk_projects_outcome_status
+    CHECK (outcome_status IN ('pending','ready','failed'));
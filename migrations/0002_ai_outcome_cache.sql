@@ -0,0 +1,9 @@
+-- Shared tier of the OpenAI outcome cache (OPENAI_CACHE_DB=true).
+CREATE TABLE IF NOT EXISTS ai_outcome_cache (
+    key        TEXT PRIMARY KEY,
+    outcome    TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    expires_at TIMESTAMPTZ NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_aoc_expires_at ON ai_outcome_cache (expires_at);
+CREATE INDEX IF NOT EXISTS ix_aoc_created_at ON ai_outcome_cache (created_at);
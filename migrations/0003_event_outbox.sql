@@ -0,0 +1,11 @@
+-- Transactional outbox for ArtifactUploaded (and future) events.
+CREATE TABLE IF NOT EXISTS event_outbox (
+    id         BIGSERIAL PRIMARY KEY,
+    event_type VARCHAR NOT NULL,
+    payload    JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    sent_at    TIMESTAMPTZ,
+    attempts   INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_outbox_unsent ON event_outbox (id) WHERE sent_at IS NULL;
@@ -0,0 +1,6 @@
+-- Track in-progress S3 multipart uploads on discovery_artifacts.
+ALTER TABLE discovery_artifacts
+    ADD COLUMN IF NOT EXISTS multipart_upload_id TEXT,
+    ADD COLUMN IF NOT EXISTS multipart_part_size BIGINT;
+CREATE INDEX IF NOT EXISTS ix_da_multipart_open
+    ON discovery_artifacts (created_at) WHERE multipart_upload_id IS NOT NULL;
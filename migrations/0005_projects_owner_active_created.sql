@@ -0,0 +1,5 @@
+-- Covering index for keyset pagination of /projects/api/list.
+-- CONCURRENTLY can't run inside a transaction; run this file on its own.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_projects_owner_active_created
+    ON projects (owner_id, created DESC, id DESC)
+    WHERE status = 'active';
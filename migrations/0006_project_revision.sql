@@ -0,0 +1,3 @@
+-- Per-project version for ETags / response caching.
+ALTER TABLE projects
+    ADD COLUMN IF NOT EXISTS revision INTEGER NOT NULL DEFAULT 1;
@@ -0,0 +1,5 @@
+-- Lets the startup sweep find outcomes stuck in 'pending' without a table scan.
+-- CONCURRENTLY can't run inside a transaction; run this file on its own.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_projects_outcome_pending
+    ON projects (created)
+    WHERE outcome_status = 'pending';
@@ -0,0 +1,148 @@
+"""
+Shared fixtures. Settings are read when app.* is imported, so the
+environment is set up here first.
+
+DB tests run against TEST_DATABASE_URL (a throwaway postgresql+asyncpg://
+database; its tables are dropped and recreated) or, if that is unset, an
+embedded server started with pgserver. Without either they are skipped.
+"""
+import asyncio
+import os
+import tempfile
+import uuid
+
+import pytest
+
+def _database_url():
+    url = os.environ.get("TEST_DATABASE_URL")
+    if url:
+        return url
+    try:
+        import pgserver
+    except ImportError:
+        return None
+    server = pgserver.get_server(tempfile.mkdtemp(prefix="logima-test-pg-"), cleanup_mode="delete")
+    return server.get_uri().replace("postgresql://", "postgresql+asyncpg://", 1)
+
+DATABASE_URL = _database_url()
+
+os.environ["DATABASE_URL"] = DATABASE_URL or "postgresql+asyncpg://test@127.0.0.1:1/test"
+os.environ.pop("SQS_UPLOADS_QUEUE_URL", None)
+for _name, _value in {
+    "GOOGLE_CLIENT_ID": "test-client", "GOOGLE_CLIENT_SECRET": "test-secret",
+    "GOOGLE_REDIRECT_URL": "http://testserver/auth/google/callback",
+    "SESSION_SECRET": "test-session-secret", "SECRET_KEY": "test-secret-key-0123456789abcdef0123",
+    "OPENAI_API_KEY": "test", "S3_BUCKET": "test-bucket",
+    "AWS_ACCESS_KEY_ID": "test", "AWS_SECRET_ACCESS_KEY": "test",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+requires_db = pytest.mark.skipif(DATABASE_URL is None, reason="no TEST_DATABASE_URL and pgserver not installed")
+
+@pytest.fixture(scope="session")
+def db_schema():
+    if DATABASE_URL is None:
+        pytest.skip("no test database")
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from app import models
+
+    async def _create():
+        engine = create_async_engine(DATABASE_URL)
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.drop_all)
+            await conn.run_sync(models.Base.metadata.create_all)
+        await engine.dispose()
+
+    asyncio.run(_create())
+
+async def _fresh_engine():
+    from app import database
+
+    database._engine = None
+    database._engine_lock = asyncio.Lock()
+    return await database.get_engine()
+
+@pytest.fixture
+async def engine(db_schema):
+    """The app's engine (app.database.get_engine), rebuilt for each test's event loop."""
+    from app import database
+
+    eng = await _fresh_engine()
+    try:
+        yield eng
+    finally:
+        await eng.dispose()
+        database._engine = None
+
+@pytest.fixture
+def statements(engine):
+    """First keyword of every statement run on the app's engine, in order."""
+    from sqlalchemy import event
+
+    seen = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement.split(None, 1)[0].upper())
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _record)
+    yield seen
+    event.remove(engine.sync_engine, "before_cursor_execute", _record)
+
+@pytest.fixture
+async def client(engine):
+    """httpx client for the app, in-process (no lifespan: engine comes from the fixture)."""
+    import httpx
+    from app.main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as c:
+        yield c
+
+async def create_user(engine, email=None, password_hash=None) -> uuid.UUID:
+    from sqlalchemy import insert
+    from app import models
+
+    uid = uuid.uuid4()
+    async with engine.begin() as conn:
+        await conn.execute(insert(models.User).values(
+            id=uid, email=email or f"user-{uid.hex[:12]}@example.com", password_hash=password_hash,
+        ))
+    return uid
+
+async def create_project(engine, owner_id, description="Help teams ship faster.") -> uuid.UUID:
+    from sqlalchemy import insert
+    from app import models
+
+    pid = uuid.uuid4()
+    async with engine.begin() as conn:
+        await conn.execute(insert(models.Project).values(
+            id=pid, name="project", status="active", owner_id=owner_id,
+            description=description, outcome_status="ready",
+        ))
+    return pid
+
+def log_in(client, user_id) -> dict:
+    """Give `client` session cookies for `user_id`; returns the CSRF header for writes."""
+    from app.security import make_access_token, make_csrf
+
+    csrf = make_csrf()
+    client.cookies.set("access_token", make_access_token(sub=str(user_id)))
+    client.cookies.set("csrf_token", csrf)
+    return {"X-CSRF-Token": csrf}
+
+class SlowOpenAI:
+    """Fake AsyncOpenAI: responses.create sleeps `latency_s`; `on_call` runs mid-call."""
+
+    def __init__(self, latency_s: float, on_call=None):
+        self.latency_s = latency_s
+        self.on_call = on_call
+        self.calls = 0
+        self.responses = self
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency_s / 2)
+        if self.on_call is not None:
+            self.on_call()
+        await asyncio.sleep(self.latency_s / 2)
+        from types import SimpleNamespace
+        return SimpleNamespace(output_text=f"outcome {self.calls}")
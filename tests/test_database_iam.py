@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import IamTokenProvider, install_iam_auth
+from tests.conftest import DATABASE_URL, requires_db
+
+pytestmark = requires_db
+
+class FakeRdsSigner:
+    """Stands in for rds.generate_db_auth_token; `token` can be rolled mid-test."""
+
+    def __init__(self, token: str):
+        self.token = token
+        self.delay_s = 0.0
+        self.calls = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        token = self.token
+        await asyncio.sleep(self.delay_s)
+        return token
+
+class RecordingProvider(IamTokenProvider):
+    """Records the password each new connection was given."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.handed_out = []
+
+    async def get(self) -> str:
+        token = await super().get()
+        self.handed_out.append(token)
+        return token
+
+async def _connect(engine):
+    conn = await engine.connect()
+    await conn.execute(text("select 1"))
+    return conn
+
+async def test_connections_after_roll_get_new_token_without_blocking():
+    signer = FakeRdsSigner("token-1")
+    provider = RecordingProvider(mint=signer)
+    engine = create_async_engine(DATABASE_URL, pool_size=1, max_overflow=10, pool_timeout=2)
+    install_iam_auth(engine, provider)
+    held = []
+    try:
+        await provider.refresh()
+        held.append(await _connect(engine))
+
+        # Roll the token with a slow signer, as the background refresher would.
+        signer.token, signer.delay_s = "token-2", 0.3
+        refresh = asyncio.create_task(provider.refresh())
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        held.append(await _connect(engine))  # connects while the refresh is in flight
+        assert time.monotonic() - started < 0.2
+        await refresh
+        held.append(await _connect(engine))
+
+        assert provider.handed_out == ["token-1", "token-1", "token-2"]
+    finally:
+        for conn in held:
+            await conn.close()
+        await engine.dispose()
+
+async def test_expired_token_is_minted_once_for_concurrent_connects():
+    signer = FakeRdsSigner("token-1")
+    provider = RecordingProvider(mint=signer, ttl_seconds=0.05)
+    engine = create_async_engine(DATABASE_URL, pool_size=5, max_overflow=0, pool_timeout=2)
+    install_iam_auth(engine, provider)
+    try:
+        await provider.refresh()
+        await asyncio.sleep(0.1)  # token is now stale
+        signer.token, signer.delay_s = "token-2", 0.05
+        calls_before = signer.calls
+        conns = await asyncio.gather(*(_connect(engine) for _ in range(5)))
+        assert signer.calls == calls_before + 1
+        assert provider.handed_out == ["token-2"] * 5
+        for conn in conns:
+            await conn.close()
+    finally:
+        await engine.dispose()
@@ -0,0 +1,102 @@
+"""
+Sign-in goes through CachedOidcApp, which overrides Authlib's (private)
+load_server_metadata and fetch_jwk_set. These run the real Authlib
+parse_id_token against a fake provider, so an Authlib upgrade that stops
+calling them the same way fails here.
+"""
+import asyncio
+import time
+import uuid
+
+import httpx
+import pytest
+from joserfc import jwt
+from joserfc.jwk import RSAKey
+
+from app.config import settings
+from app.routers import auth
+from app.services import google_oidc as google_oidc_module
+from app.services.google_oidc import OidcProviderCache
+from tests.conftest import requires_db
+
+ISSUER = "https://accounts.example.com"
+
+class FakeProvider:
+    """Discovery document + JWKS over httpx.MockTransport; `rotate()` swaps the signing key."""
+
+    def __init__(self):
+        self.key = RSAKey.generate_key(2048, parameters={"kid": "k1"}, private=True)
+        self.jwks_fetches = 0
+
+    def rotate(self, kid: str) -> None:
+        self.key = RSAKey.generate_key(2048, parameters={"kid": kid}, private=True)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/.well-known/openid-configuration":
+            return httpx.Response(200, json={
+                "issuer": ISSUER,
+                "jwks_uri": f"{ISSUER}/certs",
+                "userinfo_endpoint": f"{ISSUER}/userinfo",
+                "id_token_signing_alg_values_supported": ["RS256"],
+            })
+        if request.url.path == "/certs":
+            self.jwks_fetches += 1
+            await asyncio.sleep(0.01)  # long enough for concurrent misses to overlap
+            return httpx.Response(200, json={"keys": [self.key.as_dict(private=False)]})
+        return httpx.Response(404)
+
+    def id_token(self, email: str, nonce: str) -> str:
+        now = int(time.time())
+        claims = {"iss": ISSUER, "aud": settings.GOOGLE_CLIENT_ID, "sub": "123", "iat": now,
+                  "exp": now + 300, "nonce": nonce, "email": email, "email_verified": True}
+        return jwt.encode({"alg": "RS256", "kid": self.key.kid}, claims, self.key)
+
+@pytest.fixture
+def provider(monkeypatch):
+    fake = FakeProvider()
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(google_oidc_module.httpx, "AsyncClient",
+                        lambda **kw: real_client(transport=httpx.MockTransport(fake.handle), **kw))
+    cache = OidcProviderCache(f"{ISSUER}/.well-known/openid-configuration", ttl_s=3600,
+                              min_refetch_interval_s=0)
+    monkeypatch.setattr(auth, "google_oidc", cache)
+    monkeypatch.setattr(auth, "_oauth", None)  # register a fresh client against this cache
+    return fake, cache
+
+async def test_known_kid_uses_the_cached_keys(provider):
+    fake, cache = provider
+    userinfo = await auth.google().parse_id_token({"id_token": fake.id_token("a@example.com", "n")}, nonce="n")
+    assert userinfo["email"] == "a@example.com"
+    await auth.google().parse_id_token({"id_token": fake.id_token("a@example.com", "n")}, nonce="n")
+    assert fake.jwks_fetches == 1 and cache.kid_miss_refetches == 0
+
+async def test_unknown_kid_refetches_the_jwks_exactly_once(provider):
+    fake, cache = provider
+    await cache.metadata()  # startup prefetch, with the old key
+    fake.rotate("k2")
+    tokens = [{"id_token": fake.id_token(f"u{i}@example.com", "n")} for i in range(3)]
+    results = await asyncio.gather(*(auth.google().parse_id_token(t, nonce="n") for t in tokens))
+    assert [r["email"] for r in results] == ["u0@example.com", "u1@example.com", "u2@example.com"]
+    assert fake.jwks_fetches == 2 and cache.kid_miss_refetches == 1
+
+class FakeGoogle:
+    """authorize_access_token without an id_token; userinfo comes from the endpoint."""
+
+    def __init__(self, email):
+        self.email = email
+        self.userinfo_calls = 0
+
+    async def authorize_access_token(self, request):
+        return {"access_token": "at"}
+
+    async def get(self, url, token):
+        self.userinfo_calls += 1
+        return httpx.Response(200, json={"email": self.email, "email_verified": True})
+
+@requires_db
+async def test_callback_without_id_token_falls_back_to_userinfo(client, monkeypatch):
+    fake = FakeGoogle(f"g-{uuid.uuid4().hex[:12]}@example.com")
+    monkeypatch.setattr(auth, "google", lambda: fake)
+    r = await client.get("/auth/google/callback")
+    assert r.status_code == 302, r.text
+    assert fake.userinfo_calls == 1 and "access_token" in r.cookies
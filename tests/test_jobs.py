@@ -0,0 +1,74 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, update
+
+from app import models
+from app.routers import projects
+from app.services.jobs import JobQueueFull, JobRunner
+from app.services.openai_service import OUTCOME_FALLBACK
+from tests.conftest import create_project, create_user, requires_db
+
+class FailureLog:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+
+async def test_on_failure_runs_on_timeout_and_error():
+    runner = JobRunner(concurrency=2, timeout_s=0.05)
+    timed_out, errored, ok = FailureLog(), FailureLog(), FailureLog()
+
+    async def boom():
+        raise RuntimeError("boom")
+
+    runner.submit(lambda: asyncio.sleep(1), on_failure=timed_out)
+    runner.submit(boom, on_failure=errored)
+    runner.submit(lambda: asyncio.sleep(0), on_failure=ok)
+    await asyncio.sleep(0.2)
+    assert (timed_out.calls, errored.calls, ok.calls) == (1, 1, 0)
+
+async def test_on_failure_runs_for_jobs_cancelled_at_shutdown():
+    runner = JobRunner(concurrency=1, timeout_s=10)
+    running, queued = FailureLog(), FailureLog()
+    runner.submit(lambda: asyncio.sleep(10), on_failure=running)
+    runner.submit(lambda: asyncio.sleep(10), on_failure=queued)  # still waiting for the slot
+    await asyncio.sleep(0)
+    await runner.shutdown(grace_s=0.05)
+    assert (running.calls, queued.calls) == (1, 1)
+    assert runner.pending == 0
+
+async def test_submit_rejects_beyond_max_pending():
+    runner = JobRunner(concurrency=1, timeout_s=10, max_pending=2)
+    runner.submit(lambda: asyncio.sleep(10))
+    runner.submit(lambda: asyncio.sleep(10))
+    with pytest.raises(JobQueueFull):
+        runner.submit(lambda: asyncio.sleep(10))
+    assert runner.rejected == 1
+    await runner.shutdown(grace_s=0)
+
+@requires_db
+async def test_startup_sweep_fails_only_abandoned_pending_outcomes(engine):
+    owner = await create_user(engine)
+    stale, fresh = await create_project(engine, owner), await create_project(engine, owner)
+    old = datetime.now(timezone.utc) - timedelta(hours=1)
+    async with engine.begin() as conn:
+        await conn.execute(update(models.Project).where(models.Project.id == stale)
+                           .values(outcome_status="pending", created=old))
+        await conn.execute(update(models.Project).where(models.Project.id == fresh)
+                           .values(outcome_status="pending"))
+
+    await projects.fail_stale_outcomes()
+
+    async with engine.connect() as conn:
+        rows = dict((await conn.execute(
+            select(models.Project.id, models.Project.outcome_status)
+            .where(models.Project.id.in_([stale, fresh]))
+        )).all())
+        outcome = (await conn.execute(
+            select(models.Project.project_outcome).where(models.Project.id == stale)
+        )).scalar_one()
+    assert rows == {stale: "failed", fresh: "pending"}
+    assert outcome == OUTCOME_FALLBACK
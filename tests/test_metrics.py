@@ -0,0 +1,14 @@
+from app import metrics
+from app.cache import TTLCache
+
+def test_cache_hits_and_misses_are_counters(monkeypatch):
+    cache: TTLCache[int] = TTLCache(4, 60)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    monkeypatch.setattr(metrics, "_collectors", [("logima_test_cache", cache.stats)])
+    lines = metrics.render().splitlines()
+    assert "# TYPE logima_test_cache_hits_total counter" in lines
+    assert "logima_test_cache_hits_total 1.0" in lines
+    assert "# TYPE logima_test_cache_misses_total counter" in lines
+    assert "# TYPE logima_test_cache_size gauge" in lines
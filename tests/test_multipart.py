@@ -0,0 +1,44 @@
+"""POST /uploads/multipart/parts only signs part numbers the upload can actually have."""
+import uuid
+
+import pytest
+from sqlalchemy import insert
+
+from app import models
+from app.services.aws import clients as aws_clients
+from app.services.s3_service import S3_MIN_PART_SIZE
+from tests.conftest import requires_db
+
+pytestmark = requires_db
+
+class PresignOnlyS3:
+    async def generate_presigned_url(self, op, Params, ExpiresIn):
+        return f"https://s3.local/{Params['Key']}?partNumber={Params['PartNumber']}"
+
+@pytest.fixture
+def fake_s3():
+    aws_clients.override("s3", PresignOnlyS3())
+    yield
+    aws_clients._clients.pop("s3", None)
+
+async def _open_upload(engine, size_bytes) -> str:
+    key = f"uploads/{uuid.uuid4().hex}/big.pdf"
+    async with engine.begin() as conn:
+        await conn.execute(insert(models.DiscoveryArtifact).values(
+            s3_key=key, original_filename="big.pdf", content_type="application/pdf", s3_bucket="b",
+            size_bytes=size_bytes, multipart_upload_id="upload-1", multipart_part_size=S3_MIN_PART_SIZE,
+        ))
+    return key
+
+@pytest.mark.parametrize("part_numbers, status", [([1, 3], 200), ([4], 400), ([0, 1], 400)])
+async def test_part_numbers_are_bounded_by_the_declared_size(client, engine, fake_s3, part_numbers, status):
+    key = await _open_upload(engine, size_bytes=2 * S3_MIN_PART_SIZE + 1)  # three parts
+    r = await client.post("/uploads/multipart/parts", json={"key": key, "part_numbers": part_numbers})
+    assert r.status_code == status, r.text
+    if status == 200:
+        assert [p["part_number"] for p in r.json()["parts"]] == part_numbers
+
+async def test_part_numbers_never_exceed_the_s3_limit(client, engine, fake_s3):
+    key = await _open_upload(engine, size_bytes=None)
+    r = await client.post("/uploads/multipart/parts", json={"key": key, "part_numbers": [10_001]})
+    assert r.status_code == 400
@@ -0,0 +1,223 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import delete, select
+
+from app.database import session_scope
+from app.models import AiOutcomeCache
+from app.services.openai_service import OUTCOME_FALLBACK, OpenAIService, OutcomeCache, outcome_cache_key
+from app.services.resilience import CircuitBreaker
+from tests.conftest import requires_db
+
+class FakeClient:
+    """responses.create that sleeps `latency_s` and counts concurrent calls."""
+
+    def __init__(self, latency_s: float = 0.0):
+        self.latency_s = latency_s
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self.responses = self
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.latency_s)
+        finally:
+            self.active -= 1
+        return SimpleNamespace(output_text=f"outcome {self.calls}")
+
+def _service(client, **kwargs) -> OpenAIService:
+    kwargs.setdefault("max_concurrency", 1)
+    kwargs.setdefault("queue_timeout_s", 0.02)
+    return OpenAIService(client=client, **kwargs)
+
+async def test_queue_timeouts_racing_releases_never_leak_permits():
+    svc = _service(FakeClient())
+    loop = asyncio.get_running_loop()
+    for i in range(60):
+        async with svc._slot():
+            # release the slot at (about) the instant the waiter's timeout fires
+            waiter = asyncio.ensure_future(svc._governed(lambda: asyncio.sleep(0, "ok")))
+            await asyncio.sleep(svc.queue_timeout_s - 0.0005 + (i % 10) * 0.0001)
+        await waiter
+        assert svc._slots._value == 1, f"permit leaked on iteration {i}"
+    assert svc.in_flight == 0 and svc.queued == 0
+
+async def test_queue_timeout_returns_fallback():
+    svc = _service(FakeClient(latency_s=0.3))
+    first = asyncio.ensure_future(svc.generate_outcome("first"))
+    await asyncio.sleep(0.01)
+    assert await svc.generate_outcome("second") == OUTCOME_FALLBACK
+    assert svc.queue_timeouts == 1
+    await first
+    assert svc._slots._value == 1
+
+class FailingClient(FakeClient):
+    async def create(self, **kwargs):
+        self.calls += 1
+        raise RuntimeError("upstream down")
+
+def _warm_latency(svc: OpenAIService, seconds: float = 0.01) -> None:
+    for _ in range(svc.latency.min_samples):
+        svc.latency.record(seconds)
+
+async def test_hedge_is_skipped_when_no_slot_is_free():
+    client = FakeClient(latency_s=0.1)
+    svc = _service(client, hedge=True)
+    _warm_latency(svc)
+    assert await svc.generate_outcome("no spare slot") == "outcome 1"
+    assert client.max_active == 1 and svc.hedges == 0
+
+async def test_hedge_takes_its_own_slot():
+    client = FakeClient(latency_s=0.1)
+    svc = _service(client, hedge=True, max_concurrency=2)
+    _warm_latency(svc)
+    await svc.generate_outcome("spare slot")
+    assert svc.hedges == 1 and client.max_active == 2
+    await asyncio.sleep(0)  # let the losing call's done-callback run
+    assert svc._slots._value == 2 and svc.in_flight == 0
+
+async def test_no_backoff_once_the_breaker_opens():
+    client = FailingClient()
+    svc = _service(client, retries=3, breaker=CircuitBreaker("test", failure_threshold=1))
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    assert await svc.generate_outcome("down") == OUTCOME_FALLBACK
+    assert client.calls == 1
+    assert loop.time() - started < 0.1
+
+class StreamingClient:
+    """responses.create(stream=True) yielding `words`, then hanging if `stall`."""
+
+    def __init__(self, words, stall: bool = False):
+        self.words = words
+        self.stall = stall
+        self.closed = False
+        self.responses = self
+
+    async def create(self, **kwargs):
+        return self
+
+    async def __aiter__(self):
+        for w in self.words:
+            yield SimpleNamespace(type="response.output_text.delta", delta=w)
+        if self.stall:
+            await asyncio.sleep(3600)
+
+    async def close(self):
+        self.closed = True
+
+async def _collect(agen) -> list:
+    return [chunk async for chunk in agen]
+
+async def test_stalled_stream_times_out_and_frees_the_slot():
+    client = StreamingClient([], stall=True)
+    svc = _service(client, stream_idle_s=0.05, breaker=CircuitBreaker("test", failure_threshold=1))
+    assert await asyncio.wait_for(_collect(svc.stream_outcome("stall")), 1) == [OUTCOME_FALLBACK]
+    assert svc.breaker.state == CircuitBreaker.OPEN
+    assert client.closed and svc._slots._value == 1
+
+async def test_stream_deadline_applies_after_text_was_sent():
+    client = StreamingClient(["partial "], stall=True)
+    svc = _service(client, stream_idle_s=10, stream_deadline_s=0.05)
+    chunks = []
+    with pytest.raises(TimeoutError):
+        async for chunk in svc.stream_outcome("deadline"):
+            chunks.append(chunk)
+    assert chunks == ["partial "] and svc._slots._value == 1
+
+async def test_slow_reader_does_not_hold_the_slot():
+    svc = _service(StreamingClient(["a ", "b ", "c"]))
+    stream = svc.stream_outcome("slow reader")
+    assert await anext(stream) == "a "
+    await asyncio.sleep(0.01)  # upstream is done; the rest is buffered
+    assert svc._slots._value == 1
+    assert await _collect(stream) == ["b ", "c"]
+
+# --- OutcomeCache ------------------------------------------------------------
+
+class BlankClient(FakeClient):
+    async def create(self, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(output_text="   ")
+
+async def test_fallback_is_never_cached():
+    client = FailingClient()
+    svc = _service(client, retries=0)
+    assert await svc.generate_outcome("down") == OUTCOME_FALLBACK
+    assert await svc.generate_outcome("down") == OUTCOME_FALLBACK
+    assert client.calls == 2 and len(svc.cache._memory) == 0
+
+async def test_empty_answer_is_never_cached():
+    client = BlankClient()
+    svc = _service(client)
+    assert await svc.generate_outcome("blank") == OUTCOME_FALLBACK
+    await svc.generate_outcome("blank")
+    assert client.calls == 2 and len(svc.cache._memory) == 0
+
+def test_whitespace_variants_share_a_key():
+    key = outcome_cache_key("m", "prompt", "Help teams\n  ship   faster. ")
+    assert key == outcome_cache_key("m", "prompt", "Help teams ship faster.")
+    assert key != outcome_cache_key("m", "prompt", "Help teams ship slower.")
+    assert key != outcome_cache_key("other-model", "prompt", "Help teams ship faster.")
+
+async def test_whitespace_variants_reuse_the_cached_outcome():
+    client = FakeClient()
+    svc = _service(client)
+    first = await svc.generate_outcome("Help teams ship faster.")
+    assert await svc.generate_outcome("  Help teams\tship faster.\n") == first
+    assert client.calls == 1
+
+async def test_memory_tier_evicts_lru_and_expired_entries():
+    cache = OutcomeCache(memory_entries=2, ttl_s=60)
+    for key in ("a", "b"):
+        await cache.set(key, key.upper())
+    await cache.get("a")  # "b" is now least recently used
+    await cache.set("c", "C")
+    assert [await cache.get(k) for k in ("a", "b", "c")] == ["A", None, "C"]
+
+    short = OutcomeCache(memory_entries=2, ttl_s=0.05)
+    await short.set("a", "A")
+    await asyncio.sleep(0.06)
+    assert await short.get("a") is None
+
+async def _db_rows() -> dict:
+    async with session_scope() as db:
+        rows = (await db.execute(select(AiOutcomeCache.key, AiOutcomeCache.outcome))).all()
+    return dict(rows)
+
+@pytest.fixture
+async def outcome_table(engine):
+    async with session_scope() as db:
+        await db.execute(delete(AiOutcomeCache))
+        await db.commit()
+
+@requires_db
+async def test_db_tier_is_shared_and_upserts(outcome_table):
+    await OutcomeCache(memory_entries=8, ttl_s=60, use_db=True).set("k", "first")
+    await OutcomeCache(memory_entries=8, ttl_s=60, use_db=True).set("k", "second")
+    assert await _db_rows() == {"k": "second"}
+    # a fresh instance (another process) reads it through, then serves it from memory
+    other = OutcomeCache(memory_entries=8, ttl_s=60, use_db=True)
+    assert await other.get("k") == "second"
+    assert other._memory.get("k") == "second"
+
+@requires_db
+async def test_db_tier_trims_expired_and_overflowing_rows(outcome_table):
+    now = datetime.now(timezone.utc)
+    async with session_scope() as db:
+        db.add(AiOutcomeCache(key="expired", outcome="x", created_at=now - timedelta(hours=2),
+                              expires_at=now - timedelta(hours=1)))
+        await db.commit()
+    cache = OutcomeCache(memory_entries=8, ttl_s=60, use_db=True, db_max_rows=2)
+    cache._TRIM_EVERY = 3
+    for i in range(3):
+        await cache.set(f"k{i}", f"v{i}")
+        await asyncio.sleep(0.001)  # distinct created_at, newest last
+    assert await _db_rows() == {"k1": "v1", "k2": "v2"}
+    assert await OutcomeCache(memory_entries=8, ttl_s=60, use_db=True).get("expired") is None
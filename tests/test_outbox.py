@@ -0,0 +1,99 @@
+"""
+The relay matches SQS failures back to outbox rows by batch index, and
+nothing is written to the outbox when no queue (hence no relay) exists.
+"""
+import pytest
+from sqlalchemy import delete, select
+
+from app.config import settings
+from app.database import session_scope
+from app.models import DiscoveryArtifact, EventOutbox
+from app.services import outbox
+from app.services.aws import clients as aws_clients
+from app.services.event_bus import send_batch
+from tests.conftest import requires_db
+
+pytestmark = requires_db
+
+class RejectingSqs:
+    """send_message_batch that rejects every entry whose MessageBody is in `reject`."""
+
+    def __init__(self, reject):
+        self.reject = reject
+        self.calls = 0
+
+    async def send_message_batch(self, QueueUrl, Entries):
+        self.calls += 1
+        failed = [e for e in Entries if e["MessageBody"] in self.reject]
+        return {
+            "Successful": [{"Id": e["Id"]} for e in Entries if e not in failed],
+            "Failed": [{"Id": e["Id"], "Code": "InternalError", "Message": "nope"} for e in failed],
+        }
+
+@pytest.fixture
+def fake_sqs(monkeypatch):
+    monkeypatch.setattr(settings, "SQS_UPLOADS_QUEUE_URL", "https://sqs.local/000000000000/test")
+    sqs = RejectingSqs(reject={'{"n": 1}'})
+    aws_clients.override("sqs", sqs)
+    yield sqs
+    aws_clients._clients.pop("sqs", None)
+
+async def _reset_outbox():
+    async with session_scope() as db:
+        await db.execute(delete(EventOutbox))
+        await db.commit()
+
+async def test_relay_marks_only_the_rejected_row_failed(engine, fake_sqs):
+    await _reset_outbox()
+    async with session_scope() as db:
+        db.add_all([EventOutbox(event_type="Test", payload={"n": n}) for n in range(3)])
+        await db.commit()
+
+    assert await outbox.relay_once() == 3
+    async with session_scope() as db:
+        rows = (await db.execute(select(EventOutbox).order_by(EventOutbox.id))).scalars().all()
+    assert [(r.payload["n"], r.sent_at is not None, r.attempts) for r in rows] == [
+        (0, True, 0), (1, False, 1), (2, True, 0),
+    ]
+
+async def test_nothing_is_enqueued_without_a_queue(engine, monkeypatch):
+    monkeypatch.setattr(settings, "SQS_UPLOADS_QUEUE_URL", None)
+    await _reset_outbox()
+    artifact = DiscoveryArtifact(s3_key="uploads/x.pdf", s3_bucket="b", original_filename="x.pdf",
+                                 content_type="application/pdf")
+    async with session_scope() as db:
+        outbox.enqueue_artifact_uploaded(db, artifact)
+        assert not db.new
+
+class FlakySqs(RejectingSqs):
+    """Rejects `reject` bodies on the first call only; records every batch's bodies."""
+
+    def __init__(self, reject):
+        super().__init__(reject)
+        self.batches = []
+
+    async def send_message_batch(self, QueueUrl, Entries):
+        self.batches.append([e["MessageBody"] for e in Entries])
+        resp = await super().send_message_batch(QueueUrl, Entries)
+        self.reject = set()
+        return resp
+
+async def test_send_batch_retries_only_the_failed_entries(fake_sqs):
+    flaky = FlakySqs(reject={'{"n": 1}'})
+    aws_clients.override("sqs", flaky)
+    assert await send_batch([{"n": 0}, {"n": 1}, {"n": 2}], backoff_s=0) == []
+    assert flaky.batches == [['{"n": 0}', '{"n": 1}', '{"n": 2}'], ['{"n": 1}']]
+
+async def test_send_batch_reports_indexes_still_failing(fake_sqs):
+    assert await send_batch([{"n": 0}, {"n": 1}], attempts=2, backoff_s=0) == [1]
+    assert fake_sqs.calls == 2
+
+async def test_drain_publishes_what_is_left_at_shutdown(engine, fake_sqs):
+    await _reset_outbox()
+    async with session_scope() as db:
+        db.add_all([EventOutbox(event_type="Test", payload={"n": n}) for n in (0, 2, 3)])
+        await db.commit()
+    await outbox.drain(timeout_s=5, batch_size=2)
+    async with session_scope() as db:
+        unsent = (await db.execute(select(EventOutbox).where(EventOutbox.sent_at.is_(None)))).scalars().all()
+    assert unsent == []
@@ -0,0 +1,69 @@
+"""POST /projects/api/{id}/ai-refresh/stream against a fake model stream."""
+import uuid
+
+import orjson
+import pytest
+from sqlalchemy import select
+
+from app import models
+from app.routers import projects
+from app.services.resilience import CircuitBreaker
+from tests.conftest import create_project, create_user, log_in, requires_db
+from tests.test_openai_service import StreamingClient
+
+pytestmark = requires_db
+
+def _events(body: bytes) -> list:
+    out = []
+    for block in body.decode().strip().split("\n\n"):
+        event, data = block.split("\n")
+        out.append((event.removeprefix("event: "), orjson.loads(data.removeprefix("data: "))))
+    return out
+
+@pytest.fixture
+def model(monkeypatch):
+    def _use(client):
+        monkeypatch.setattr(projects.oai_service, "_client", client)
+        monkeypatch.setattr(projects.oai_service, "stream_idle_s", 0.05)
+        monkeypatch.setattr(projects.oai_service, "breaker", CircuitBreaker("test"))  # stalls count as failures
+    return _use
+
+async def _refresh(client, engine) -> tuple:
+    uid = await create_user(engine)
+    pid = await create_project(engine, uid, description=f"Stream {uuid.uuid4().hex}")
+    r = await client.post(f"/projects/api/{pid}/ai-refresh/stream", headers=log_in(client, uid))
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/event-stream")
+    async with engine.connect() as conn:
+        row = (await conn.execute(
+            select(models.Project.outcome_status, models.Project.project_outcome).where(models.Project.id == pid)
+        )).one()
+    return _events(r.content), row
+
+async def test_deltas_then_done(client, engine, model):
+    model(StreamingClient(["Ship ", "it."]))
+    events, row = await _refresh(client, engine)
+    assert events == [
+        ("delta", {"text": "Ship "}), ("delta", {"text": "it."}),
+        ("done", {"outcome_status": "ready", "project_outcome": "Ship it."}),
+    ]
+    assert tuple(row) == ("ready", "Ship it.")
+
+async def test_empty_stream_is_stored_as_failed(client, engine, model):
+    model(StreamingClient([]))
+    events, row = await _refresh(client, engine)
+    assert events[-1] == ("done", {"outcome_status": "failed", "project_outcome": projects.OUTCOME_FALLBACK})
+    assert tuple(row) == ("failed", projects.OUTCOME_FALLBACK)
+
+async def test_idle_stream_times_out_to_the_fallback(client, engine, model):
+    model(StreamingClient([], stall=True))
+    events, row = await _refresh(client, engine)
+    assert events == [
+        ("delta", {"text": projects.OUTCOME_FALLBACK}),
+        ("done", {"outcome_status": "failed", "project_outcome": projects.OUTCOME_FALLBACK}),
+    ]
+    assert tuple(row) == ("failed", projects.OUTCOME_FALLBACK)
+
+async def test_stall_after_text_ends_with_an_error_event(client, engine, model):
+    model(StreamingClient(["Half "], stall=True))
+    events, _ = await _refresh(client, engine)
+    assert events == [("delta", {"text": "Half "}), ("error", {"detail": "AI generation failed"})]
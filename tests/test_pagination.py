@@ -0,0 +1,67 @@
+"""Keyset cursors for GET /projects/api/list."""
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import insert
+
+from app import models
+from app.pagination import decode_cursor, encode_cursor
+from app.routers.projects import PAGE_SIZE_DEFAULT
+from tests.conftest import create_user, log_in, requires_db
+
+def test_cursor_round_trips():
+    created, id = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc), uuid.uuid4()
+    cursor = encode_cursor(created, id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created, id)
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(datetime.now(timezone.utc), uuid.uuid4())[:-4], "W10"])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+async def _user_with_projects(client, engine, n: int) -> list:
+    """Log in as a new user owning `n` active projects; returns their ids newest first."""
+    uid = await create_user(engine)
+    log_in(client, uid)
+    async with engine.begin() as conn:
+        ids = (await conn.execute(
+            insert(models.Project).returning(models.Project.id, models.Project.created),
+            [dict(name=f"p{i}", status="active", owner_id=uid, outcome_status="ready") for i in range(n)],
+        )).all()
+    return [id for id, _ in sorted(ids, key=lambda r: (r.created, r.id), reverse=True)]
+
+@requires_db
+async def test_pages_cover_the_list_once_and_the_last_has_no_cursor(client, engine):
+    expected = await _user_with_projects(client, engine, 60)
+    seen, pages, cursor = [], [], None
+    while True:
+        params = {"limit": 25, **({"cursor": cursor} if cursor else {})}
+        r = await client.get("/projects/api/list", params=params)
+        assert r.status_code == 200, r.text
+        pages.append(len(r.json()))
+        seen += [uuid.UUID(p["id"]) for p in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert pages == [25, 25, 10]
+    assert seen == expected  # in order, no duplicates or gaps at the page boundaries
+
+@requires_db
+async def test_no_limit_or_cursor_returns_the_whole_list(client, engine):
+    expected = await _user_with_projects(client, engine, PAGE_SIZE_DEFAULT + 5)
+    r = await client.get("/projects/api/list")
+    assert r.status_code == 200, r.text
+    assert [uuid.UUID(p["id"]) for p in r.json()] == expected
+    assert "X-Next-Cursor" not in r.headers
+
+    first = await client.get("/projects/api/list", params={"limit": 1})
+    r = await client.get("/projects/api/list", params={"cursor": first.headers["X-Next-Cursor"]})
+    assert len(r.json()) == PAGE_SIZE_DEFAULT  # a cursor alone pages at the default size
+
+@requires_db
+async def test_malformed_cursor_is_a_400(client, engine):
+    await _user_with_projects(client, engine, 1)
+    r = await client.get("/projects/api/list", params={"cursor": "not-a-cursor"})
+    assert r.status_code == 400
@@ -0,0 +1,74 @@
+"""
+ai-refresh awaits the model for a long time; the request must not hold a
+pooled connection while it does (release_connection), or a handful of
+concurrent refreshes starve everything else of connections.
+"""
+import asyncio
+import uuid
+
+import pytest
+
+from app import database
+from app.config import settings
+from app.routers import projects
+from tests.conftest import SlowOpenAI, _fresh_engine, create_project, create_user, log_in, requires_db
+
+pytestmark = requires_db
+
+POOL_SIZE = 2
+CONCURRENT = 6
+MODEL_LATENCY_S = 1.0
+
+@pytest.fixture
+async def small_pool(db_schema, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", POOL_SIZE)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT_SECONDS", 0.5)
+    eng = await _fresh_engine()
+    try:
+        yield eng
+    finally:
+        await eng.dispose()
+        database._engine = None
+
+@pytest.fixture
+def slow_model(monkeypatch):
+    samples = []
+    fake = SlowOpenAI(MODEL_LATENCY_S, on_call=lambda: samples.append(database.pool_stats()["checked_out"]))
+    monkeypatch.setattr(projects.oai_service, "_client", fake)
+    return fake, samples
+
+async def _refresh_concurrently(engine):
+    import httpx
+    from app.main import app
+
+    owner = await create_user(engine)
+    # distinct descriptions: no singleflight coalescing or outcome-cache hits
+    ids = [await create_project(engine, owner, description=f"project {uuid.uuid4()}") for _ in range(CONCURRENT)]
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        csrf = log_in(client, owner)
+        return await asyncio.gather(
+            *(client.post(f"/projects/api/{pid}/ai-refresh", headers=csrf) for pid in ids),
+            return_exceptions=True,
+        )
+
+async def test_ai_refresh_holds_no_connection_during_model_call(small_pool, slow_model):
+    fake, samples = slow_model
+    responses = await _refresh_concurrently(small_pool)
+
+    assert [getattr(r, "status_code", r) for r in responses] == [200] * CONCURRENT
+    assert fake.calls == CONCURRENT
+    assert samples and all(n == 0 for n in samples)
+
+async def test_holding_the_connection_starves_the_pool(small_pool, slow_model, monkeypatch):
+    # Control: the same load without release_connection exhausts the pool.
+    async def keep_connection(session):
+        return None
+
+    monkeypatch.setattr(projects, "release_connection", keep_connection)
+    fake, samples = slow_model
+    responses = await _refresh_concurrently(small_pool)
+
+    failed = [r for r in responses if not getattr(r, "status_code", None) == 200]
+    assert failed, "expected pool timeouts when connections are held across the model call"
+    assert max(samples) == POOL_SIZE
@@ -0,0 +1,29 @@
+from app import deps
+from tests.conftest import create_user, log_in, requires_db
+
+pytestmark = requires_db
+
+async def test_cached_principal_skips_postgres(client, engine, statements):
+    uid = await create_user(engine)
+    log_in(client, uid)
+
+    statements.clear()
+    assert (await client.get("/auth/me")).status_code == 200
+    assert statements == ["SELECT"]  # first request loads the user
+
+    hits = deps._user_cache.hits
+    statements.clear()
+    r = await client.get("/auth/me")
+    assert r.status_code == 200 and r.json()["id"] == str(uid)
+    assert statements == []
+    assert deps._user_cache.hits == hits + 1
+
+async def test_invalidate_user_forces_a_reload(client, engine, statements):
+    uid = await create_user(engine)
+    log_in(client, uid)
+    await client.get("/auth/me")
+
+    deps.invalidate_user(uid)
+    statements.clear()
+    assert (await client.get("/auth/me")).status_code == 200
+    assert statements == ["SELECT"]
@@ -0,0 +1,30 @@
+import uuid
+
+from app.response_cache import CachedBody, ProjectReadCache
+
+def _body(text: str) -> CachedBody:
+    return CachedBody(etag=f'"{text}"', body=text.encode(), headers={})
+
+def test_forgotten_owner_generation_is_never_reused():
+    cache = ProjectReadCache(maxsize=2, ttl_seconds=60)
+    owner = uuid.uuid4()
+    cache.put(cache.list_key(owner, None, 50), _body("page before the write"))
+    cache.invalidate(owner_id=owner)
+    # Push the owner's generation out of the LRU while the old page is still cached.
+    cache.invalidate(owner_id=uuid.uuid4())
+    cache.invalidate(owner_id=uuid.uuid4())
+    assert cache.get(cache.list_key(owner, None, 50)) is None
+
+def test_read_racing_a_write_does_not_cache_the_old_body():
+    cache = ProjectReadCache(maxsize=16, ttl_seconds=60)
+    project = uuid.uuid4()
+    key = cache.project_key(project)  # GET takes its key, then reads the row...
+    cache.invalidate(project_id=project)  # ...a PATCH commits meanwhile...
+    cache.put(key, _body("old revision"))  # ...and the GET stores what it read.
+    assert cache.get(cache.project_key(project)) is None
+
+def test_unchanged_project_is_served_from_cache():
+    cache = ProjectReadCache(maxsize=16, ttl_seconds=60)
+    project = uuid.uuid4()
+    cache.put(cache.project_key(project), _body("current"))
+    assert cache.get(cache.project_key(project)).body == b"current"
@@ -0,0 +1,10 @@
+import uuid
+
+import orjson
+from asyncpg.pgproto.pgproto import UUID as AsyncpgUUID
+
+from app.responses import dumps
+
+def test_dumps_encodes_asyncpg_uuids_like_stdlib_ones():
+    value = uuid.uuid4()
+    assert orjson.loads(dumps({"a": AsyncpgUUID(str(value)), "b": value})) == {"a": str(value), "b": str(value)}
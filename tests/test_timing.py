@@ -0,0 +1,54 @@
+import asyncio
+import contextvars
+import time
+
+from app import timing
+from app.services.jobs import JobRunner
+from tests.test_openai_service import FakeClient, _service
+
+def _in_request(coro) -> tuple:
+    """Run `coro` as its own task with a fresh RequestTimings, like TimingMiddleware does."""
+    timings = timing.RequestTimings()
+    ctx = contextvars.copy_context()
+    ctx.run(timing._current.set, timings)
+    return asyncio.create_task(coro, context=ctx), timings
+
+def test_span_leaves_out_nested_db_time():
+    timings = timing.RequestTimings()
+    token = timing._current.set(timings)
+    try:
+        started = time.perf_counter()
+        with timing.span("auth"):
+            time.sleep(0.02)
+            timing.record("db", 0.015)
+        elapsed = time.perf_counter() - started
+    finally:
+        timing._current.reset(token)
+    assert timings.spans["db"] == [1, 0.015]
+    assert timings.spans["auth"][1] <= elapsed - 0.015
+
+async def test_jobs_do_not_inherit_request_timings():
+    runner = JobRunner(concurrency=1, timeout_s=1)
+    seen = []
+
+    async def handler():
+        async def job():
+            seen.append(timing._current.get())
+            timing.record("db", 1.0)
+        runner.submit(job)
+
+    task, timings = _in_request(handler())
+    await task
+    await runner.shutdown()
+    assert seen == [None] and timings.spans == {}
+
+async def test_every_singleflight_caller_is_charged_its_wait():
+    svc = _service(FakeClient(latency_s=0.05), max_concurrency=2)
+    leader, leader_timings = _in_request(svc.generate_outcome("shared"))
+    await asyncio.sleep(0)
+    joiner, joiner_timings = _in_request(svc.generate_outcome("shared"))
+    assert await leader == await joiner
+    assert svc.coalesced == 1
+    for timings in (leader_timings, joiner_timings):
+        count, seconds = timings.spans["openai"]
+        assert count == 1 and seconds >= 0.04
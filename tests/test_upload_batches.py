@@ -0,0 +1,105 @@
+"""POST /uploads/presign-batch and /uploads/confirm-batch against bench's FakeS3, counting statements."""
+import uuid
+
+import pytest
+from sqlalchemy import insert, select
+
+from app import models
+from app.config import settings
+from app.routers.uploads import CONFIRM_RETRY_AFTER_S
+from app.services.aws import clients as aws_clients
+from bench.fakes import FakeS3
+from tests.conftest import requires_db
+
+pytestmark = requires_db
+
+@pytest.fixture
+def fake_s3(monkeypatch):
+    monkeypatch.setattr(settings, "SQS_UPLOADS_QUEUE_URL", "https://sqs.local/000000000000/test")  # outbox on
+    s3 = FakeS3(latency_s=0)
+    aws_clients.override("s3", s3)
+    yield s3
+    aws_clients._clients.pop("s3", None)
+
+async def _pending(engine, n: int) -> list:
+    keys = [f"uploads/{uuid.uuid4().hex}/f{i}.pdf" for i in range(n)]
+    async with engine.begin() as conn:
+        await conn.execute(insert(models.DiscoveryArtifact).values([
+            dict(s3_key=k, original_filename=k.rsplit("/", 1)[1], content_type="application/pdf",
+                 s3_bucket="b", status="pending")
+            for k in keys
+        ]))
+    return keys
+
+async def test_confirm_batch_is_one_update_and_one_outbox_insert(client, engine, fake_s3, statements):
+    visible = await _pending(engine, 3)
+    (unseen,) = await _pending(engine, 1)  # recorded, but S3 can't see it yet
+    missing = f"uploads/{uuid.uuid4().hex}/nope.pdf"
+    for key in visible:
+        fake_s3.objects[key] = 1234
+
+    statements.clear()
+    r = await client.post("/uploads/confirm-batch", json={"keys": [*visible, unseen, missing, visible[0]]})
+    assert r.status_code == 200, r.text
+    assert statements == ["SELECT", "UPDATE", "INSERT"]
+
+    results = r.json()["results"]
+    assert [res["key"] for res in results] == [*visible, unseen, missing]  # duplicates dropped
+    assert [(res["status"], res["size_bytes"], res["retry_after"]) for res in results[:3]] == [("uploaded", 1234, None)] * 3
+    assert (results[3]["status"], results[3]["retry_after"]) == ("not_visible", CONFIRM_RETRY_AFTER_S)
+    assert (results[4]["status"], results[4]["retry_after"]) == ("not_found", None)
+
+    async with engine.connect() as conn:
+        rows = (await conn.execute(
+            select(models.DiscoveryArtifact.s3_key, models.DiscoveryArtifact.status,
+                   models.DiscoveryArtifact.size_bytes, models.DiscoveryArtifact.uploaded_at)
+            .where(models.DiscoveryArtifact.s3_key.in_([*visible, unseen]))
+        )).all()
+        events = (await conn.execute(
+            select(models.EventOutbox.payload).where(models.EventOutbox.event_type == "ArtifactUploaded")
+        )).scalars().all()
+    state = {key: (status, size, at is not None) for key, status, size, at in rows}
+    assert state == {**{k: ("uploaded", 1234, True) for k in visible}, unseen: ("pending", None, False)}
+    confirmed = [e["artifact"]["s3_key"] for e in events if e["artifact"]["s3_key"] in {*visible, unseen}]
+    assert sorted(confirmed) == sorted(visible)
+
+async def test_confirm_batch_with_nothing_visible_writes_nothing(client, engine, fake_s3, statements):
+    keys = await _pending(engine, 2)
+    statements.clear()
+    r = await client.post("/uploads/confirm-batch", json={"keys": keys})
+    assert r.status_code == 200, r.text
+    assert [res["status"] for res in r.json()["results"]] == ["not_visible"] * 2
+    assert statements == ["SELECT"]
+
+async def test_presign_batch_reports_rejects_per_file_and_inserts_once(client, engine, fake_s3, statements):
+    files = [
+        {"filename": "a.pdf", "content_type": "application/pdf"},
+        {"filename": "b.exe", "content_type": "application/x-msdownload"},
+        {"filename": "c.png", "content_type": "image/png", "max_bytes": settings.S3_MAX_BYTES + 1},
+        {"filename": "d.png", "content_type": "image/png"},
+    ]
+    statements.clear()
+    r = await client.post("/uploads/presign-batch", json={"files": files})
+    assert r.status_code == 200, r.text
+    assert statements == ["INSERT"]
+
+    results = r.json()["results"]
+    assert [res["index"] for res in results] == [0, 1, 2, 3]
+    assert [res["upload"] is not None for res in results] == [True, False, False, True]
+    assert "Disallowed content type" in results[1]["error"] and "max_bytes" in results[2]["error"]
+    assert results[0]["error"] is None and results[3]["error"] is None
+
+    keys = [results[0]["upload"]["key"], results[3]["upload"]["key"]]
+    async with engine.connect() as conn:
+        rows = (await conn.execute(
+            select(models.DiscoveryArtifact.original_filename, models.DiscoveryArtifact.status)
+            .where(models.DiscoveryArtifact.s3_key.in_(keys))
+        )).all()
+    assert sorted(rows) == [("a.pdf", "pending"), ("d.png", "pending")]
+
+async def test_presign_batch_with_every_file_rejected_writes_nothing(client, engine, fake_s3, statements):
+    statements.clear()
+    r = await client.post("/uploads/presign-batch", json={"files": [{"filename": "b.exe", "content_type": "x/y"}]})
+    assert r.status_code == 200, r.text
+    assert r.json()["results"][0]["upload"] is None
+    assert statements == []
@@ -0,0 +1,103 @@
+"""
+Statements each write path issues, counted with a before_cursor_execute
+listener (the `statements` fixture), against what the ORM versions issued before (BASELINE).
+"""
+import uuid
+
+from sqlalchemy import text
+
+from app.routers import auth, projects
+from tests.conftest import SlowOpenAI, create_project, create_user, log_in, requires_db
+
+pytestmark = requires_db
+
+# First keyword of each statement the ORM implementations issued, principal cache warm.
+BASELINE = {
+    "create": ["INSERT", "SELECT"],                      # add + commit, refresh
+    "patch": ["SELECT", "UPDATE", "SELECT"],             # get, commit, refresh
+    "ai_refresh": ["SELECT", "UPDATE", "SELECT"],        # get, commit, refresh
+    "register_new": ["SELECT", "INSERT", "SELECT"],      # lookup, add + commit, refresh
+    "register_duplicate": ["SELECT"],
+    "google_new": ["SELECT", "INSERT", "SELECT"],        # lookup, add + commit, refresh
+    "google_returning": ["SELECT"],
+}
+
+def _compare(path: str, seen: list, expected: list) -> None:
+    assert seen == expected
+    assert len(seen) <= len(BASELINE[path])
+
+async def _logged_in(client, engine) -> tuple:
+    uid = await create_user(engine)
+    headers = log_in(client, uid)
+    assert (await client.get("/auth/me")).status_code == 200  # warms the principal cache
+    return uid, headers
+
+async def test_create_is_one_insert(client, engine, statements, monkeypatch):
+    _, headers = await _logged_in(client, engine)
+    jobs = []
+    monkeypatch.setattr(projects.outcome_jobs, "submit", lambda job, **kw: jobs.append(job))
+    statements.clear()
+    r = await client.post("/projects/api/create", json={"name": "p", "status": "active"}, headers=headers)
+    assert r.status_code == 201, r.text
+    _compare("create", statements, ["INSERT"])
+    assert len(jobs) == 1
+
+async def test_patch_is_one_update(client, engine, statements):
+    uid, headers = await _logged_in(client, engine)
+    pid = await create_project(engine, uid)
+    statements.clear()
+    r = await client.patch(f"/projects/api/{pid}", json={"name": "renamed"}, headers=headers)
+    assert r.status_code == 200, r.text
+    _compare("patch", statements, ["UPDATE"])
+
+async def test_ai_refresh_writes_with_one_update(client, engine, statements, monkeypatch):
+    uid, headers = await _logged_in(client, engine)
+    pid = await create_project(engine, uid, description=f"Refresh {uuid.uuid4().hex}")
+    monkeypatch.setattr(projects.oai_service, "_client", SlowOpenAI(0))
+    statements.clear()
+    r = await client.post(f"/projects/api/{pid}/ai-refresh", headers=headers)
+    assert r.status_code == 200, r.text
+    # the description has to be read before the model call; the write itself is one UPDATE
+    _compare("ai_refresh", statements, ["SELECT", "UPDATE"])
+
+async def test_register_checks_the_email_before_hashing(client, engine, statements, monkeypatch):
+    email = f"new-{uuid.uuid4().hex[:12]}@example.com"
+    statements.clear()
+    r = await client.post("/auth/register", json={"email": email, "password": "correct horse"})
+    assert r.status_code == 201, r.text
+    _compare("register_new", statements, ["SELECT", "INSERT"])
+
+    async def no_hash(password):
+        raise AssertionError("a duplicate signup must not hash its password")
+
+    monkeypatch.setattr(auth, "hash_password_async", no_hash)
+    statements.clear()
+    r = await client.post("/auth/register", json={"email": email, "password": "correct horse"})
+    assert r.status_code == 400
+    _compare("register_duplicate", statements, ["SELECT"])
+
+class FakeGoogle:
+    def __init__(self, email):
+        self.email = email
+
+    async def authorize_access_token(self, request):
+        return {"userinfo": {"email": self.email, "email_verified": True}}
+
+async def _row_version(engine, email: str) -> tuple:
+    async with engine.connect() as conn:
+        return (await conn.execute(text("SELECT id, xmin::text FROM users WHERE email = :e"), {"e": email})).one()
+
+async def test_google_sign_in_is_one_statement_and_read_only_for_returning_users(
+        client, engine, statements, monkeypatch):
+    email = f"g-{uuid.uuid4().hex[:12]}@example.com"
+    monkeypatch.setattr(auth, "google", lambda: FakeGoogle(email))
+
+    statements.clear()
+    assert (await client.get("/auth/google/callback")).status_code == 302
+    _compare("google_new", statements, ["WITH"])
+    before = await _row_version(engine, email)
+
+    statements.clear()
+    assert (await client.get("/auth/google/callback")).status_code == 302
+    _compare("google_returning", statements, ["WITH"])
+    assert await _row_version(engine, email) == before  # same tuple: nothing was rewritten